@@ -0,0 +1,146 @@
+"""
+Benchmarks of the interactive hot paths of ImageSegmenter.
+
+These are run with `asv <https://asv.readthedocs.io>`_, e.g. ``asv run`` or
+``asv continuous main HEAD``. Everything is drawn with the Agg backend so no
+display is needed.
+"""
+import matplotlib
+
+matplotlib.use("agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from mpl_image_segmenter import ImageSegmenter  # noqa: E402
+from mpl_image_segmenter.example_images import (  # noqa: E402
+    color_image_stack,
+    example_mask_stack,
+)
+
+
+def _square(center, side):
+    lo = center - side / 2
+    hi = center + side / 2
+    return [(lo, lo), (lo, hi), (hi, hi), (hi, lo)]
+
+
+def _random_mask(shape, classes):
+    return np.random.default_rng(0).integers(0, classes + 1, shape, dtype=np.uint16)
+
+
+class Constructor:
+    params = [512, 2048, 4096]
+    param_names = ["size"]
+
+    def setup(self, size):
+        self.imgs = np.zeros((3, size, size), dtype=np.uint8)
+
+    def teardown(self, size):
+        plt.close("all")
+
+    def time_constructor(self, size):
+        ImageSegmenter(self.imgs)
+
+    def peakmem_constructor(self, size):
+        ImageSegmenter(self.imgs)
+
+
+class Onselect:
+    params = ([512, 4096], [16, 256, 1024], [1, 50], ["matplotlib", "scanline"])
+    param_names = ["size", "stroke", "classes", "rasterizer"]
+
+    def setup(self, size, stroke, classes, rasterizer):
+        if stroke >= size:
+            raise NotImplementedError
+        self.seg = ImageSegmenter(
+            np.zeros((size, size), dtype=np.uint8),
+            classes=classes,
+            rasterizer=rasterizer,
+        )
+        self.verts = _square(size / 2, stroke)
+
+    def teardown(self, size, stroke, classes, rasterizer):
+        plt.close("all")
+
+    def time_onselect(self, size, stroke, classes, rasterizer):
+        self.seg._onselect(self.verts)
+
+
+class OnselectBlit:
+    """A stroke after the figure has been drawn, so that blitting is possible."""
+
+    params = ([512, 4096], [16, 256])
+    param_names = ["size", "stroke"]
+
+    def setup(self, size, stroke):
+        self.seg = ImageSegmenter(
+            np.zeros((size, size), dtype=np.uint8), rasterizer="scanline"
+        )
+        self.seg.fig.canvas.draw()
+        self.verts = _square(size / 2, stroke)
+
+    def teardown(self, size, stroke):
+        plt.close("all")
+
+    def time_onselect(self, size, stroke):
+        self.seg._onselect(self.verts)
+
+
+class SwitchImage:
+    params = ([512, 2048], [1, 10, 100])
+    param_names = ["size", "classes"]
+
+    def setup(self, size, classes):
+        shape = (2, size, size)
+        self.seg = ImageSegmenter(
+            np.zeros(shape, dtype=np.uint8),
+            classes=classes,
+            mask=_random_mask(shape, classes),
+            mask_dtype=np.uint16,
+        )
+
+    def teardown(self, size, classes):
+        plt.close("all")
+
+    def time_image_index(self, size, classes):
+        self.seg.image_index = 1 - self.seg.image_index
+
+    def time_refresh_overlay_values(self, size, classes):
+        self.seg._refresh_overlay_values()
+
+
+class ExampleImages:
+    """The example stack and mask that ship with the package."""
+
+    def setup(self):
+        self.imgs = color_image_stack()
+        self.mask = example_mask_stack()
+        self.seg = ImageSegmenter(
+            self.imgs, classes=int(self.mask.max()), mask=self.mask, color_image=True
+        )
+
+    def teardown(self):
+        plt.close("all")
+
+    def time_constructor(self):
+        ImageSegmenter(
+            self.imgs, classes=int(self.mask.max()), mask=self.mask, color_image=True
+        )
+
+    def time_image_index(self):
+        self.seg.image_index = (self.seg.image_index + 1) % self.imgs.shape[0]
+
+    def time_onselect(self):
+        self.seg._onselect(_square(256, 128))
+
+
+class Import:
+    """Importing the package, each time in a fresh interpreter."""
+
+    def timeraw_import(self):
+        return "import mpl_image_segmenter"
+
+    def timeraw_pyplot_after_import(self):
+        # what creating the first segmenter adds on top of the import
+        return "import matplotlib.pyplot", "import mpl_image_segmenter"
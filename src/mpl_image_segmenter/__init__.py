@@ -6,10 +6,18 @@ try:
 except PackageNotFoundError:
     __version__ = "uninstalled"
 
+from ._encoding import SparseMask, rle_decode, rle_encode
+from ._polygons import mask_to_polygons
+from ._rasterize import rasterize_stack
 from ._segmenter import ImageSegmenter
 
 __author__ = "Ian Hunt-Isaak"
 __email__ = "ianhuntisaak@gmail.com"
 __all__ = [
     "ImageSegmenter",
+    "SparseMask",
+    "mask_to_polygons",
+    "rasterize_stack",
+    "rle_decode",
+    "rle_encode",
 ]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ._storage import PathLike
+
+_SLICE_NAME = re.compile(r"mask_(\d+)\.npy")
+_STROKES_NAME = re.compile(r"strokes_(\d+)\.npz")
+# merge the stroke files into one once there are this many
+_MAX_STROKE_FILES = 64
+
+Strokes = Dict[str, np.ndarray]
+
+
+def _atomic_write(path: str, write: Callable[[IO[bytes]], None]) -> None:
+    """Write a file so that it is either entirely old or entirely new after a crash."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _truncate(strokes: Strokes, n: int) -> Strokes:
+    """Keep the first *n* of some packed strokes."""
+    stop = int(strokes["stops"][n - 1]) if n else 0
+    kept = {key: arr[:n] for key, arr in strokes.items()}
+    kept["vertices"] = strokes["vertices"][:stop]
+    return kept
+
+
+def _replace_from(strokes: Strokes | None, start: int, new: Strokes) -> Strokes:
+    """Replace the packed strokes from *start* on with *new*."""
+    if strokes is None or start == 0:
+        return new
+    kept = _truncate(strokes, start)
+    offset = len(kept["vertices"])
+    return {
+        key: np.concatenate(
+            [kept[key], new[key] + offset if key == "stops" else new[key]]
+        )
+        for key in new
+    }
+
+
+class Autosaver:
+    """
+    Save a mask and its strokes to a directory on a background thread.
+
+    The mask of each image is kept in its own ``mask_<index>.npy`` file so
+    that only the images that changed need to be written. Each save of the
+    strokes writes a new ``strokes_<n>.npz`` file with only the strokes that
+    changed, which are merged into one file now and then. Every file is
+    written to a temporary file and renamed into place, so a crash never
+    leaves a partially written file. Whatever failed to be written is tried
+    again with the next save.
+
+    Parameters
+    ----------
+    directory : str or path-like
+        Where to save. It is created if it doesn't exist.
+    shape : (int, int, int)
+        The shape of the mask stack.
+    dtype : dtype
+        The dtype of the mask.
+    """
+
+    def __init__(self, directory: PathLike, shape: tuple[int, ...], dtype: np.dtype):
+        self._directory = os.fspath(directory)
+        os.makedirs(self._directory, exist_ok=True)
+        self._shape = shape
+        self._dtype = dtype
+        self._lock = threading.Lock()
+        self._slices: dict[int, np.ndarray] = {}
+        # the strokes to write, replacing the saved ones from the given one on
+        self._strokes: tuple[int, Strokes] | None = None
+        self._stroke_files = sorted(
+            int(match.group(1))
+            for match in map(_STROKES_NAME.fullmatch, os.listdir(self._directory))
+            if match is not None
+        )
+        self._writing: Future | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="mpl-image-segmenter-autosave"
+        )
+
+    def load(self) -> tuple[np.ndarray | None, dict[str, np.ndarray] | None]:
+        """
+        Load the latest snapshot from the directory.
+
+        Returns
+        -------
+        mask : np.ndarray or None
+            The saved mask, with zeros for images that were never saved. None if
+            nothing was saved.
+        strokes : dict[str, np.ndarray] or None
+            The strokes as packed by `StrokeHistory.to_arrays`. None if they
+            were never saved.
+        """
+        mask = None
+        for name in sorted(os.listdir(self._directory)):
+            match = _SLICE_NAME.fullmatch(name)
+            if match is None:
+                continue
+            index = int(match.group(1))
+            saved = np.load(os.path.join(self._directory, name))
+            if index >= self._shape[0] or saved.shape != self._shape[1:]:
+                raise ValueError(
+                    f"{name} in {self._directory} does not fit a mask of shape"
+                    f" {self._shape}"
+                )
+            if mask is None:
+                mask = np.zeros(self._shape, dtype=self._dtype)
+            mask[index] = saved
+        return mask, self._load_strokes()
+
+    def _load_strokes(self) -> Strokes | None:
+        strokes = None
+        for number in self._stroke_files:
+            path = os.path.join(self._directory, f"strokes_{number:06d}.npz")
+            with np.load(path) as saved:
+                new = dict(saved)
+            start = int(new.pop("start"))
+            strokes = _replace_from(strokes, start, new)
+        return strokes
+
+    def save(self, slices: dict[int, np.ndarray], start: int, strokes: Strokes) -> None:
+        """
+        Write the masks of some images and the strokes in the background.
+
+        This never waits for the disk. If earlier snapshots have not been written
+        yet only the newest data for each file is written.
+
+        Parameters
+        ----------
+        slices : dict[int, np.ndarray]
+            Copies of the mask of each image that changed, by image index. They
+            must not be modified afterwards.
+        start : int
+            How many of the strokes saved before are unchanged.
+        strokes : dict[str, np.ndarray]
+            The strokes from *start* on, as packed by `StrokeHistory.to_arrays`.
+        """
+        with self._lock:
+            self._slices.update(slices)
+            self._queue_strokes(start, strokes)
+            if self._writing is None:
+                self._writing = self._executor.submit(self._write)
+
+    def _queue_strokes(self, start: int, strokes: Strokes) -> None:
+        if self._strokes is not None and start > self._strokes[0]:
+            queued_start, queued = self._strokes
+            strokes = _replace_from(queued, start - queued_start, strokes)
+            start = queued_start
+        self._strokes = (start, strokes)
+
+    def _write(self) -> None:
+        while True:
+            with self._lock:
+                if not self._slices and self._strokes is None:
+                    self._writing = None
+                    return
+                slices, self._slices = self._slices, {}
+                strokes, self._strokes = self._strokes, None
+            try:
+                for index in list(slices):
+                    path = os.path.join(self._directory, f"mask_{index:05d}.npy")
+                    mask = slices[index]
+                    _atomic_write(path, partial(np.save, arr=mask))
+                    del slices[index]
+                if strokes is not None:
+                    self._write_strokes(*strokes)
+                    strokes = None
+            except BaseException:
+                # put back what wasn't written, behind anything newer, so that
+                # the next save tries again
+                with self._lock:
+                    for index, mask in slices.items():
+                        self._slices.setdefault(index, mask)
+                    if strokes is not None:
+                        newer, self._strokes = self._strokes, strokes
+                        if newer is not None:
+                            self._queue_strokes(*newer)
+                    self._writing = None
+                raise
+
+    def _write_strokes(self, start: int, strokes: Strokes) -> None:
+        if len(self._stroke_files) >= _MAX_STROKE_FILES:
+            # merge everything into one file, and then remove the old ones
+            strokes = _replace_from(self._load_strokes(), start, strokes)
+            start = 0
+        number = self._stroke_files[-1] + 1 if self._stroke_files else 0
+        path = os.path.join(self._directory, f"strokes_{number:06d}.npz")
+        arrays: dict[str, Any] = {"start": np.int64(start), **strokes}
+        _atomic_write(path, lambda f: np.savez(f, **arrays))
+        if start == 0:
+            for old in self._stroke_files:
+                os.remove(os.path.join(self._directory, f"strokes_{old:06d}.npz"))
+            self._stroke_files = []
+        self._stroke_files.append(number)
+
+    def wait(self) -> None:
+        """Wait until everything passed to `save` has been written."""
+        with self._lock:
+            writing = self._writing
+        if writing is not None:
+            # raise any error from writing
+            writing.result()
+
+    def close(self) -> None:
+        """Finish writing and stop the background thread."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class FrameCache:
+    """
+    A thread safe LRU cache of frames that can load frames in the background.
+
+    Parameters
+    ----------
+    load : callable
+        Called with the index of a frame to load it. When prefetching this
+        is called from a worker thread.
+    maxsize : int
+        The maximum number of frames to keep.
+    max_workers : int, default 2
+        The number of threads used to prefetch frames.
+    """
+
+    def __init__(self, load: Callable[[int], Any], maxsize: int, max_workers: int = 2):
+        self._load = load
+        self._maxsize = maxsize
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        # reentrant as done callbacks run immediately if the load already finished
+        self._lock = threading.RLock()
+        self._frames: OrderedDict[int, Any] = OrderedDict()
+        self._pending: dict[int, Future] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, index: int) -> Any:
+        """Get a frame, loading it if it is not cached."""
+        with self._lock:
+            if index in self._frames:
+                self._hits += 1
+                self._frames.move_to_end(index)
+                return self._frames[index]
+            future = self._pending.get(index)
+        if future is not None:
+            # a prefetch is in flight so wait for that rather than loading twice
+            value = future.result()
+            with self._lock:
+                self._hits += 1
+            return value
+        value = self._load(index)
+        with self._lock:
+            self._misses += 1
+            self._store(index, value)
+        return value
+
+    def prefetch(self, indices: list[int]) -> None:
+        """Start loading any of *indices* that are not cached on worker threads."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="mpl-image-segmenter-prefetch",
+                )
+            for index in indices:
+                if index in self._frames or index in self._pending:
+                    continue
+                future = self._executor.submit(self._load, index)
+                self._pending[index] = future
+                future.add_done_callback(partial(self._prefetched, index))
+
+    def _prefetched(self, index: int, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(index) is not future:
+                return
+            del self._pending[index]
+            if future.exception() is None:
+                self._store(index, future.result())
+
+    def _store(self, index: int, value: Any) -> None:
+        # must be called with the lock held
+        self._frames[index] = value
+        self._frames.move_to_end(index)
+        while len(self._frames) > self._maxsize:
+            self._frames.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        """
+        Get the cache statistics.
+
+        Frames that had to be loaded by `get` are misses. Frames that were
+        cached, or that `get` waited on an in-flight prefetch for, are hits.
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._frames))
+
+    def close(self) -> None:
+        """Stop the prefetching threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
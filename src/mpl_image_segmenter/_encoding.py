@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+import numpy as np
+
+
+def _counts_from_indices(indices: np.ndarray, size: int) -> list[int]:
+    """
+    Run length encode the sorted flat *indices* of the foreground of an image.
+
+    The counts alternate between background and foreground, starting with
+    background, as in COCO.
+    """
+    if len(indices) == 0:
+        return [size]
+    # a new run starts wherever the indices are not consecutive
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    starts = indices[np.r_[0, breaks]]
+    stops = indices[np.r_[breaks - 1, len(indices) - 1]] + 1
+    counts = np.empty(2 * len(starts) + 1, dtype=np.int64)
+    counts[0] = starts[0]
+    counts[1:-1:2] = stops - starts
+    counts[2:-1:2] = starts[1:] - stops[:-1]
+    counts[-1] = size - stops[-1]
+    if counts[-1] == 0:
+        counts = counts[:-1]
+    return counts.tolist()
+
+
+def _indices_from_counts(counts: Any) -> np.ndarray:
+    """Get the sorted flat indices of the foreground from COCO style counts."""
+    counts = np.asarray(counts, dtype=np.int64)
+    ends = np.cumsum(counts)
+    starts = ends[::2][: len(counts[1::2])]
+    lengths = counts[1::2]
+    total = int(lengths.sum())
+    # each index is the start of its run plus how far into the run it is
+    run_offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return run_offsets + np.arange(total, dtype=np.int64)
+
+
+def _flat_to_order(
+    indices: np.ndarray, shape: tuple[int, int], order: str
+) -> np.ndarray:
+    """Convert row-major flat indices of an image to the flat indices of *order*."""
+    if order == "C":
+        return indices
+    rows, cols = np.divmod(indices, shape[1])
+    return np.sort(cols * shape[0] + rows)
+
+
+def _flat_from_order(
+    indices: np.ndarray, shape: tuple[int, int], order: str
+) -> np.ndarray:
+    """Convert flat indices of an image in *order* to row-major flat indices."""
+    if order == "C":
+        return indices
+    cols, rows = np.divmod(indices, shape[0])
+    return np.sort(rows * shape[1] + cols)
+
+
+def _check_order(order: str) -> None:
+    if order not in ("C", "F"):
+        raise ValueError(f"order must be 'C' or 'F' - got {order!r}")
+
+
+def rle_encode(mask: Any, order: Literal["C", "F"] = "F") -> dict[str, Any]:
+    """
+    Run length encode a binary mask of a single image.
+
+    The result is an uncompressed COCO RLE, which ``pycocotools`` can convert
+    with ``frPyObjects``.
+
+    Parameters
+    ----------
+    mask : array_like
+        A 2D mask. Every nonzero pixel is foreground.
+    order : {"F", "C"}, default "F"
+        Whether to run down the columns ("F"), as COCO does, or along the
+        rows ("C").
+
+    Returns
+    -------
+    dict
+        With *size* ``[height, width]`` and *counts*, the lengths of runs
+        alternating between background and foreground starting with background.
+    """
+    _check_order(order)
+    mask = np.asarray(mask)
+    if mask.ndim != 2:
+        raise ValueError(f"mask must be 2 dimensional - got {mask.ndim}D")
+    indices = np.flatnonzero(mask.ravel(order=order))
+    return {
+        "size": list(mask.shape),
+        "counts": _counts_from_indices(indices, mask.size),
+    }
+
+
+def rle_decode(rle: dict[str, Any], order: Literal["C", "F"] = "F") -> np.ndarray:
+    """
+    Decode a run length encoded binary mask made by `rle_encode`.
+
+    Parameters
+    ----------
+    rle : dict
+        An uncompressed COCO RLE with *size* and *counts*.
+    order : {"F", "C"}, default "F"
+        The order *rle* was encoded in.
+
+    Returns
+    -------
+    np.ndarray
+        A boolean mask of shape *size*.
+    """
+    _check_order(order)
+    height, width = rle["size"]
+    mask = np.zeros(height * width, dtype=bool)
+    mask[_indices_from_counts(rle["counts"])] = True
+    return mask.reshape((height, width), order=order)
+
+
+class SparseMask:
+    """
+    A mask that only stores where the pixels of each class are.
+
+    Masks are mostly background so this is much smaller than the dense mask.
+    It can be passed as the *mask* of an `ImageSegmenter`, which is decoded
+    straight into the segmenter's mask dtype.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        The shape of the dense mask, (Y, X) or (N, Y, X).
+    indices : dict[int, array_like]
+        The row-major flat indices into the dense mask of the pixels of each
+        class. Class 0 is the background and is never stored.
+    """
+
+    def __init__(self, shape: tuple[int, ...], indices: dict[int, Any]):
+        if len(shape) not in (2, 3):
+            raise ValueError(f"shape must be 2 or 3 dimensional - got {shape}")
+        self.shape = tuple(shape)
+        self.indices = {
+            int(value): np.asarray(idx, dtype=np.int64)
+            for value, idx in indices.items()
+            if value != 0
+        }
+
+    @property
+    def classes(self) -> list[int]:
+        """The classes that have any pixels."""
+        return sorted(value for value, idx in self.indices.items() if len(idx))
+
+    @classmethod
+    def from_dense(cls, mask: Any) -> SparseMask:
+        """Make a sparse mask from a dense integer mask."""
+        mask = np.asarray(mask)
+        flat = mask.ravel()
+        nonzero = np.flatnonzero(flat)
+        values = flat[nonzero]
+        # group the pixels by class, keeping each group sorted
+        by_class = np.argsort(values, kind="stable")
+        classes, starts = np.unique(values[by_class], return_index=True)
+        groups = np.split(nonzero[by_class], starts[1:])
+        return cls(mask.shape, dict(zip(classes.tolist(), groups)))
+
+    def to_dense(self, dtype: Any = None, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Decode into a dense mask.
+
+        Parameters
+        ----------
+        dtype : dtype, optional
+            The dtype of the mask. By default the smallest unsigned integer type
+            that holds every class.
+        out : np.ndarray, optional
+            A mask of the right shape to decode into instead of a new one.
+        """
+        if out is None:
+            if dtype is None:
+                dtype = np.min_scalar_type(max(self.indices, default=0))
+            out = np.zeros(self.shape, dtype=dtype)
+        else:
+            if out.shape != self.shape:
+                raise ValueError(f"out must have shape {self.shape} - got {out.shape}")
+            out[...] = 0
+        if self.indices and max(self.indices) > np.iinfo(out.dtype).max:
+            raise ValueError(f"Class {max(self.indices)} does not fit in {out.dtype}")
+        flat = out.reshape(-1)
+        if not np.shares_memory(flat, out):
+            raise ValueError("out must be contiguous")
+        # write the larger classes last so that they win where classes overlap
+        for value in sorted(self.indices):
+            flat[self.indices[value]] = value
+        return out
+
+    def _image_shape(self) -> tuple[int, int]:
+        return self.shape[-2], self.shape[-1]
+
+    def to_rle(self, order: Literal["C", "F"] = "F") -> dict[int, Any]:
+        """
+        Run length encode the mask of every class.
+
+        Parameters
+        ----------
+        order : {"F", "C"}, default "F"
+            See `rle_encode`.
+
+        Returns
+        -------
+        dict[int, dict or list[dict]]
+            The COCO RLE of each class, as returned by `rle_encode`. For a stack
+            of images this is a list with one RLE per image.
+        """
+        _check_order(order)
+        image_shape = self._image_shape()
+        image_size = image_shape[0] * image_shape[1]
+        n_images = 1 if len(self.shape) == 2 else self.shape[0]
+        rles: dict[int, Any] = {}
+        for value in self.classes:
+            idx = self.indices[value]
+            idx = np.sort(idx)
+            bounds = np.searchsorted(idx, np.arange(n_images + 1) * image_size)
+            per_image = [
+                {
+                    "size": list(image_shape),
+                    "counts": _counts_from_indices(
+                        _flat_to_order(
+                            idx[start:stop] - i * image_size, image_shape, order
+                        ),
+                        image_size,
+                    ),
+                }
+                for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))
+            ]
+            rles[value] = per_image[0] if len(self.shape) == 2 else per_image
+        return rles
+
+    @classmethod
+    def from_rle(
+        cls,
+        rles: dict[int, Any],
+        order: Literal["C", "F"] = "F",
+        shape: tuple[int, ...] | None = None,
+    ) -> SparseMask:
+        """
+        Make a sparse mask from the RLE of each class made by `to_rle`.
+
+        Where classes overlap the larger class wins.
+
+        Parameters
+        ----------
+        rles : dict[int, dict or list[dict]]
+            The RLE of each class, or a list of the RLE of each image of a stack.
+        order : {"F", "C"}, default "F"
+            The order the RLEs were encoded in.
+        shape : tuple of int, optional
+            The shape of the mask. Only needed if *rles* is empty.
+        """
+        _check_order(order)
+        indices = {}
+        for value, rle in rles.items():
+            per_image = [rle] if isinstance(rle, dict) else list(rle)
+            image_shape = tuple(per_image[0]["size"])
+            image_size = image_shape[0] * image_shape[1]
+            value_shape = (
+                image_shape if isinstance(rle, dict) else (len(per_image), *image_shape)
+            )
+            if shape is not None and value_shape != tuple(shape):
+                raise ValueError(
+                    f"The RLEs of class {value} have shape {value_shape}"
+                    f" rather than {tuple(shape)}"
+                )
+            shape = value_shape
+            indices[value] = np.concatenate(
+                [
+                    _flat_from_order(
+                        _indices_from_counts(r["counts"]), image_shape, order
+                    )
+                    + i * image_size
+                    for i, r in enumerate(per_image)
+                ]
+            )
+        if shape is None:
+            raise ValueError("At least one class is needed to know the shape")
+        return cls(shape, indices)
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+
+class Stroke:
+    """
+    A single lasso drawn on an image.
+
+    Attributes
+    ----------
+    image_index : int
+        The image the lasso was drawn on.
+    value : int
+        The value written into the mask. 0 when erasing.
+    erasing : bool
+        Whether the lasso erased.
+    window : (slice, slice)
+        The region of the mask that the stroke could change.
+    patch : np.ndarray or None
+        The contents of *window* to restore on undo, or on redo if the stroke
+        has been undone. None once it has been dropped to stay within the
+        memory budget, after which the stroke can no longer be undone.
+    """
+
+    __slots__ = ("_vertex_range", "erasing", "image_index", "patch", "value", "window")
+
+    def __init__(
+        self,
+        image_index: int,
+        value: int,
+        erasing: bool,
+        window: tuple[slice, slice],
+        patch: np.ndarray | None,
+        vertex_range: tuple[int, int],
+    ):
+        self.image_index = image_index
+        self.value = value
+        self.erasing = erasing
+        self.window = window
+        self.patch = patch
+        self._vertex_range = vertex_range
+
+
+class StrokeHistory:
+    """
+    The strokes drawn on an `ImageSegmenter` with bounded undo and redo.
+
+    Undoing a stroke restores the mask under its bounding box from a patch
+    saved when it was drawn, so it costs time proportional to the area of the
+    stroke and never replays earlier strokes. The vertices of every stroke are
+    packed into a single array.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The memory budget for the undo patches. When it is exceeded the patches
+        of the oldest strokes are dropped, and those strokes can no longer be
+        undone. This only bounds the patches, the vertices and `Stroke` of every
+        stroke are always kept so they grow with the number of strokes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._strokes: list[Stroke] = []
+        # how many of the strokes are currently applied to the mask
+        self._n_applied = 0
+        # strokes before this have had their patches dropped
+        self._first_undoable = 0
+        self._patch_bytes = 0
+        self._vertices = np.empty((1024, 2))
+        self._n_vertices = 0
+        # the applied strokes before this haven't changed since `take_unsaved`
+        self._n_saved = 0
+
+    def __len__(self) -> int:
+        return self._n_applied
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the undo patches and the vertices."""
+        return self._patch_bytes + self._vertices.nbytes
+
+    @property
+    def can_undo(self) -> bool:
+        return self._n_applied > self._first_undoable
+
+    @property
+    def can_redo(self) -> bool:
+        return self._n_applied < len(self._strokes)
+
+    @property
+    def next_undo(self) -> Stroke:
+        """The stroke that `undo` would undo."""
+        return self._strokes[self._n_applied - 1]
+
+    @property
+    def next_redo(self) -> Stroke:
+        """The stroke that `redo` would redo."""
+        return self._strokes[self._n_applied]
+
+    def append(
+        self,
+        image_index: int,
+        value: int,
+        erasing: bool,
+        vertices: np.ndarray,
+        window: tuple[slice, slice],
+        before: np.ndarray,
+    ) -> None:
+        """
+        Record a stroke that was just drawn.
+
+        This discards any strokes that were undone, so they can't be redone.
+
+        Parameters
+        ----------
+        image_index : int
+            The image the stroke was drawn on.
+        value : int
+            The value written into the mask.
+        erasing : bool
+            Whether the stroke erased.
+        vertices : np.ndarray
+            The (N, 2) vertices of the lasso.
+        window : (slice, slice)
+            The rows and columns of the bounding box of the stroke.
+        before : np.ndarray
+            The mask inside *window* before the stroke was drawn.
+        """
+        self._discard_undone()
+        start = self._n_vertices
+        stop = start + len(vertices)
+        if stop > len(self._vertices):
+            grown = np.empty((max(stop, 2 * len(self._vertices)), 2))
+            grown[:start] = self._vertices[:start]
+            self._vertices = grown
+        self._vertices[start:stop] = vertices
+        self._n_vertices = stop
+        self._strokes.append(
+            Stroke(image_index, value, erasing, window, before, (start, stop))
+        )
+        self._n_applied += 1
+        self._patch_bytes += before.nbytes
+        self._enforce_budget()
+
+    def _discard_undone(self) -> None:
+        for stroke in self._strokes[self._n_applied :]:
+            if stroke.patch is not None:
+                self._patch_bytes -= stroke.patch.nbytes
+        del self._strokes[self._n_applied :]
+        self._n_vertices = self._strokes[-1]._vertex_range[1] if self._strokes else 0
+
+    def _enforce_budget(self) -> None:
+        while (
+            self._patch_bytes > self.max_bytes
+            and self._first_undoable < self._n_applied
+        ):
+            stroke = self._strokes[self._first_undoable]
+            if stroke.patch is not None:
+                self._patch_bytes -= stroke.patch.nbytes
+                stroke.patch = None
+            self._first_undoable += 1
+
+    def forget_patches(self) -> None:
+        """
+        Make every stroke so far impossible to undo or redo.
+
+        Call this when the mask is replaced so that undoing does not write the
+        old contents back. The applied strokes are kept.
+        """
+        self._discard_undone()
+        for stroke in self._strokes:
+            stroke.patch = None
+        self._patch_bytes = 0
+        self._first_undoable = self._n_applied
+
+    def undo(self, current: np.ndarray) -> tuple[Stroke, np.ndarray]:
+        """
+        Undo the most recent stroke.
+
+        Parameters
+        ----------
+        current : np.ndarray
+            The mask inside the window of the stroke being undone. It is kept
+            so that the stroke can be redone.
+
+        Returns
+        -------
+        stroke : Stroke
+            The stroke that was undone.
+        patch : np.ndarray
+            What to write back into the window of the stroke.
+        """
+        if not self.can_undo:
+            raise IndexError("There are no strokes to undo")
+        self._n_applied -= 1
+        self._n_saved = min(self._n_saved, self._n_applied)
+        return self._swap(self._strokes[self._n_applied], current)
+
+    def redo(self, current: np.ndarray) -> tuple[Stroke, np.ndarray]:
+        """Redo the most recently undone stroke. See `undo`."""
+        if not self.can_redo:
+            raise IndexError("There are no strokes to redo")
+        self._n_applied += 1
+        return self._swap(self._strokes[self._n_applied - 1], current)
+
+    def _swap(self, stroke: Stroke, current: np.ndarray) -> tuple[Stroke, np.ndarray]:
+        patch = stroke.patch
+        assert patch is not None
+        stroke.patch = current
+        self._patch_bytes += current.nbytes - patch.nbytes
+        return stroke, patch
+
+    def to_arrays(self, start: int = 0) -> dict[str, np.ndarray]:
+        """
+        Pack the strokes that are currently applied into arrays.
+
+        Parameters
+        ----------
+        start : int, default 0
+            Only pack the applied strokes from this one on.
+
+        Returns
+        -------
+        dict[str, np.ndarray]
+            The *vertices* of all the strokes, the index in *vertices* where
+            each stroke stops, and the *image_index*, *value*, *erasing* flag
+            and (row start, row stop, col start, col stop) *window* of each.
+            Suitable for `numpy.savez` and `from_arrays`.
+        """
+        strokes = self._strokes[start : self._n_applied]
+        first = strokes[0]._vertex_range[0] if strokes else 0
+        stops = [stroke._vertex_range[1] - first for stroke in strokes]
+        last = first + stops[-1] if stops else first
+        return {
+            "vertices": self._vertices[first:last].copy(),
+            "stops": np.array(stops, dtype=np.int64),
+            "image_index": np.array([s.image_index for s in strokes], dtype=np.int64),
+            "value": np.array([s.value for s in strokes], dtype=np.int64),
+            "erasing": np.array([s.erasing for s in strokes], dtype=bool),
+            "window": np.array(
+                [
+                    [rows.start, rows.stop, cols.start, cols.stop]
+                    for rows, cols in (s.window for s in strokes)
+                ],
+                dtype=np.int64,
+            ).reshape(-1, 4),
+        }
+
+    def take_unsaved(self) -> tuple[int, dict[str, np.ndarray]]:
+        """
+        Pack the strokes that changed since the last call.
+
+        Returns
+        -------
+        start : int
+            How many of the applied strokes are unchanged. Undoing strokes
+            makes this smaller.
+        strokes : dict[str, np.ndarray]
+            The applied strokes from *start* on, packed by `to_arrays`.
+        """
+        start = self._n_saved
+        self._n_saved = self._n_applied
+        return start, self.to_arrays(start)
+
+    def from_arrays(self, arrays: dict[str, np.ndarray]) -> None:
+        """
+        Replace the strokes with ones packed by `to_arrays`.
+
+        The strokes can't be undone as the patches are not saved.
+        """
+        vertices = np.asarray(arrays["vertices"], dtype=float).reshape(-1, 2)
+        self._vertices = np.empty((max(len(vertices), 1024), 2))
+        self._vertices[: len(vertices)] = vertices
+        self._n_vertices = len(vertices)
+        self._strokes = []
+        start = 0
+        for stop, index, value, erasing, (r0, r1, c0, c1) in zip(
+            arrays["stops"].tolist(),
+            arrays["image_index"].tolist(),
+            arrays["value"].tolist(),
+            arrays["erasing"].tolist(),
+            arrays["window"].tolist(),
+        ):
+            window = (slice(r0, r1), slice(c0, c1))
+            self._strokes.append(
+                Stroke(index, value, erasing, window, None, (start, stop))
+            )
+            start = stop
+        self._n_applied = self._first_undoable = len(self._strokes)
+        self._n_saved = self._n_applied
+        self._patch_bytes = 0
+
+    def vertices(self, stroke: Stroke) -> np.ndarray:
+        """Get the vertices of a stroke."""
+        start, stop = stroke._vertex_range
+        return self._vertices[start:stop]
+
+    def __iter__(self) -> Iterator[Stroke]:
+        """Iterate over the strokes that are currently applied, oldest first."""
+        return iter(self._strokes[: self._n_applied])
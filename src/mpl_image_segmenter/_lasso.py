@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+from matplotlib.widgets import LassoSelector
+
+
+class ThrottledLasso(LassoSelector):
+    """
+    A `~matplotlib.widgets.LassoSelector` that limits how often its line is redrawn.
+
+    Every mouse position is still added to the lasso, only drawing the line is
+    skipped when it was drawn less than ``1 / max_fps`` seconds ago. Redrawing
+    costs time proportional to the number of vertices so this keeps long strokes
+    responsive.
+
+    Parameters
+    ----------
+    *args, **kwargs
+        Passed to `~matplotlib.widgets.LassoSelector`.
+    max_fps : float, optional
+        The most times per second to redraw the line. None never skips a redraw.
+    """
+
+    def __init__(self, *args: Any, max_fps: float | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._min_interval = 0 if max_fps is None else 1 / max_fps
+        self._last_drawn = -np.inf
+
+    def _onmove(self, event: Any) -> None:
+        if self.verts is None:
+            return
+        self.verts.append(self._get_data(event))  # type: ignore
+        now = perf_counter()
+        if now - self._last_drawn < self._min_interval:
+            return
+        self._last_drawn = now
+        # matplotlib < 3.5 calls the line "line"
+        line = getattr(self, "_selection_artist", None) or self.line  # type: ignore
+        line.set_data(np.transpose(self.verts))
+        self.update()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+
+def is_lazy_array(obj: Any) -> bool:
+    """
+    Check if *obj* is array like but not a numpy array.
+
+    Objects such as ``h5py.Dataset`` or ``zarr.Array`` expose ``shape``, ``dtype``
+    and ``__getitem__`` and only read the data that is indexed, so they should not
+    be converted with `numpy.asarray`.
+    """
+    return not isinstance(obj, np.ndarray) and all(
+        hasattr(obj, attr) for attr in ("shape", "dtype", "__getitem__")
+    )
+
+
+class PaddedStack:
+    """
+    View a lazily indexable array as a stack containing only that array.
+
+    This is the lazy equivalent of ``arr[None, ...]``.
+    """
+
+    def __init__(self, arr: Any):
+        self._arr = arr
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (1, *self._arr.shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        dtype: np.dtype = np.dtype(self._arr.dtype)
+        return dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def _split_key(self, key: Any) -> tuple[Any, ...]:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if not key or not isinstance(key[0], (int, np.integer)):
+            raise IndexError("The first index of a single image stack must be an int")
+        if key[0] not in (0, -1):
+            raise IndexError(f"index {key[0]} is out of bounds for a single image")
+        return key[1:] or (Ellipsis,)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._arr[self._split_key(key)]
+
+    def __setitem__(self, key: Any, val: Any) -> None:
+        self._arr[self._split_key(key)] = val
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        return np.asarray(self._arr[...], dtype=dtype)[None]
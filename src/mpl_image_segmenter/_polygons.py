@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from ._simplify import keep_vertices
+
+# directions of the edges between pixels, in the order of a quarter turn
+# towards increasing y from increasing x
+_STEPS = np.array([[0, 1], [1, 0], [0, -1], [-1, 0]])  # (row, col)
+
+
+class Polygons(NamedTuple):
+    """
+    The outlines of one class in an image, packed into arrays.
+
+    Ring ``k`` is ``vertices[stops[k - 1]:stops[k]]``, with ``stops[-1]`` taken
+    to be 0. Rings are closed implicitly, the first vertex is not repeated.
+    """
+
+    vertices: np.ndarray
+    """The float32 (x, y) vertices of every ring, shape (M, 2)."""
+    stops: np.ndarray
+    """Where each ring stops in *vertices*, shape (R,)."""
+    holes: np.ndarray
+    """Whether each ring is the outline of a hole, shape (R,)."""
+
+
+def _boundary_edges(
+    labels: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the edges between pixels of different classes.
+
+    Each edge is directed so that its class is on the left, taking x to the
+    right and y upwards, once for each class it borders that isn't 0.
+
+    Returns
+    -------
+    value, start, end, direction : np.ndarray
+        The class of each edge, the corners it goes between as flat indices into
+        the (Y + 3, X + 3) corners of the labels padded by one pixel, and the
+        index into ``_STEPS`` of its direction.
+    """
+    padded = np.pad(labels, 1)
+    n_cols = padded.shape[1] + 1
+    values, starts, directions = [], [], []
+    # between the pixel above, a, and below, b, running along the top of b
+    a, b = padded[:-1], padded[1:]
+    row, col = np.nonzero(a != b)
+    corner = (row + 1) * n_cols + col
+    values += [b[row, col], a[row, col]]
+    starts += [corner, corner + 1]
+    directions += [0, 2]
+    # between the pixel on the left, a, and the right, b, running along the left of b
+    a, b = padded[:, :-1], padded[:, 1:]
+    row, col = np.nonzero(a != b)
+    corner = row * n_cols + col + 1
+    values += [a[row, col], b[row, col]]
+    starts += [corner, corner + n_cols]
+    directions += [1, 3]
+
+    value = np.concatenate(values).astype(np.int64)
+    start = np.concatenate(starts)
+    direction = np.repeat(directions, [len(s) for s in starts])
+    keep = value != 0
+    value, start, direction = value[keep], start[keep], direction[keep]
+    steps = _STEPS[direction]
+    end = start + steps[:, 0] * n_cols + steps[:, 1]
+    return value, start, end, direction
+
+
+def _edge_keys(
+    value: np.ndarray, corner: np.ndarray, direction: np.ndarray, n_corners: int
+) -> np.ndarray:
+    """Combine the class, start corner and direction of edges into one integer."""
+    keys: np.ndarray = (value * n_corners + corner) * 4 + direction
+    return keys
+
+
+def _link_edges(
+    value: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    direction: np.ndarray,
+    n_corners: int,
+) -> np.ndarray:
+    """
+    Find which edge follows each edge around the outline of its class.
+
+    The edges must be sorted by `_edge_keys`. Where two diagonal pixels of a
+    class meet at a corner the outline turns left, so that they are given
+    separate outlines.
+    """
+    keys = _edge_keys(value, start, direction, n_corners)
+    following = np.full(len(keys), -1)
+    for turn in (1, 0, 3):
+        wanted = _edge_keys(value, end, (direction + turn) % 4, n_corners)
+        found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        hit = (keys[found] == wanted) & (following < 0)
+        following[hit] = found[hit]
+    return following
+
+
+def _order_rings(following: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Put the edges of each ring next to each other and in order.
+
+    Both steps use pointer jumping so that they take ``O(log(ring length))``
+    vectorized passes rather than a python loop over the edges.
+
+    Returns
+    -------
+    order : np.ndarray
+        The edges ordered by ring, starting from the first edge of each ring.
+    ring : np.ndarray
+        The first edge of the ring of each edge in *order*.
+    """
+    n = len(following)
+    # the first edge of each ring is the smallest edge index in it
+    first = np.arange(n)
+    jump = following
+    while True:
+        smallest = np.minimum(first, first[jump])
+        if np.array_equal(smallest, first):
+            break
+        first = smallest
+        jump = jump[jump]
+    # cut each ring before its first edge and count the edges left after each one
+    last = following == first
+    after = (~last).astype(np.int64)
+    jump = np.where(last, np.arange(n), following)
+    while True:
+        jumped = jump[jump]
+        if np.array_equal(jumped, jump):
+            break
+        after += after[jump]
+        jump = jumped
+    order = np.lexsort((-after, first))
+    return order, first[order]
+
+
+def _outline(
+    labels: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Trace the pixel outlines of every class, keeping only the corners.
+
+    Returns
+    -------
+    vertices : np.ndarray
+        The (x, y) corners of every ring, shape (M, 2).
+    stops : np.ndarray
+        Where each ring stops in *vertices*.
+    values : np.ndarray
+        The class of each ring.
+    area : np.ndarray
+        The signed area of each ring, positive for the outside of a region.
+    """
+    value, start, end, direction = _boundary_edges(labels)
+    if len(value) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros((0, 2)), empty, empty, empty
+    n_corners = (labels.shape[0] + 3) * (labels.shape[1] + 3)
+    sort = np.argsort(_edge_keys(value, start, direction, n_corners))
+    value, start, end, direction = value[sort], start[sort], end[sort], direction[sort]
+    order, ring = _order_rings(_link_edges(value, start, end, direction, n_corners))
+
+    # a corner of a ring is where its direction changes
+    direction = direction[order]
+    ring_start = np.r_[True, ring[1:] != ring[:-1]]
+    ring_stop = np.r_[ring_start[1:], True]
+    previous = np.arange(len(order)) - 1
+    previous[ring_start] = np.flatnonzero(ring_stop)
+    corner = direction != direction[previous]
+
+    n_cols = labels.shape[1] + 3
+    row, col = np.divmod(start[order][corner], n_cols)
+    # undo the padding, and move from pixel corners to the pixel center coordinates
+    vertices = np.column_stack([col - 1.5, row - 1.5])
+    stops = np.cumsum(np.add.reduceat(corner.astype(np.int64), ring_start.nonzero()[0]))
+
+    # shoelace formula, with each vertex paired with the next one in its ring
+    nxt = np.arange(1, len(vertices) + 1)
+    nxt[stops - 1] = np.r_[0, stops[:-1]]
+    x, y = vertices.T
+    cross = x * y[nxt] - x[nxt] * y
+    area = np.add.reduceat(cross, np.r_[0, stops[:-1]]) / 2
+    return vertices, stops, value[order][ring_start], area
+
+
+def _simplify_rings(
+    vertices: np.ndarray, stops: np.ndarray, tolerance: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Simplify every ring, leaving rings that would collapse as they are."""
+    starts = np.r_[0, stops[:-1]]
+    # close the rings so that the segment back to the start keeps its shape
+    closed = np.insert(vertices, stops, vertices[starts], axis=0)
+    shift = np.arange(len(stops))
+    keep = keep_vertices(closed, starts + shift, stops + shift, tolerance)
+    keep = np.delete(keep, stops + shift)
+    counts = np.add.reduceat(keep.astype(np.int64), starts)
+    keep[np.repeat(counts < 3, stops - starts)] = True
+    return vertices[keep], np.cumsum(np.add.reduceat(keep.astype(np.int64), starts))
+
+
+def _image_polygons(labels: np.ndarray, tolerance: float) -> dict[int, Polygons]:
+    vertices, stops, values, area = _outline(labels)
+    if len(stops) == 0:
+        return {}
+    if tolerance > 0:
+        vertices, stops = _simplify_rings(vertices, stops, tolerance)
+    polygons = {}
+    starts = np.r_[0, stops[:-1]]
+    # the rings are grouped by class
+    bounds = np.flatnonzero(np.r_[True, values[1:] != values[:-1], True])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        first = starts[lo]
+        polygons[int(values[lo])] = Polygons(
+            vertices[first : stops[hi - 1]].astype(np.float32),
+            (stops[lo:hi] - first).astype(np.int64),
+            area[lo:hi] < 0,
+        )
+    return polygons
+
+
+def mask_to_polygons(
+    mask: Any, *, tolerance: float = 0, max_workers: int | None = None
+) -> dict[int, Polygons] | list[dict[int, Polygons]]:
+    """
+    Get the outlines of the regions of each class of a mask as polygons.
+
+    The outlines follow the edges of the pixels, in the same (x, y) pixel
+    coordinates as the lassos, so pixel centers are at integer coordinates.
+    Pixels that only touch at a corner are in separate regions. Every
+    region has an outer ring and an inner ring for each hole in it. Outer
+    rings have a positive area by the shoelace formula and holes a negative
+    one. The images of a stack are outlined in parallel in a process pool.
+
+    Parameters
+    ----------
+    mask : array_like
+        A mask of shape (Y, X), or a stack of masks of shape (N, Y, X). Lazily
+        indexed stacks are read one image at a time.
+    tolerance : float, default 0
+        Simplify the rings so they are at most this many pixels away from the
+        pixel outlines. 0 only drops the vertices along straight edges. Rings
+        that would collapse to fewer than 3 vertices are not simplified.
+    max_workers : int, optional
+        The number of processes to use. If None this is the number of
+        processors. With 1, or only one image, everything happens in this
+        process.
+
+    Returns
+    -------
+    dict[int, Polygons] or list[dict[int, Polygons]]
+        The `Polygons` of each class that is in the mask. For a stack of masks
+        this is a list with one dictionary per image.
+    """
+    if len(mask.shape) == 2:
+        return _image_polygons(np.asarray(mask), tolerance)
+    if len(mask.shape) != 3:
+        raise ValueError(f"mask must be 2 or 3 dimensional - got {len(mask.shape)}D")
+    if max_workers == 1 or mask.shape[0] <= 1:
+        return [
+            _image_polygons(np.asarray(mask[i]), tolerance)
+            for i in range(mask.shape[0])
+        ]
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = [
+            executor.submit(_image_polygons, np.asarray(mask[i]), tolerance)
+            for i in range(mask.shape[0])
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import itertools
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Iterator, NamedTuple
+
+import numpy as np
+
+
+class TimingStats(NamedTuple):
+    count: int  # type: ignore
+    p50: float
+    p95: float
+    max: float
+
+
+class HotPathProfiler:
+    """
+    Record how long the hot paths of an `ImageSegmenter` take.
+
+    Get one with `ImageSegmenter.enable_profiling`. The timings recorded are:
+
+    ``simplify``
+        Dropping vertices from a lasso. Also records the number of *vertices*
+        (before, after).
+    ``rasterize``
+        Finding the pixels inside a lasso. Also records the number of
+        *pixels* selected and the (rows, cols) *window* that was searched.
+    ``update_overlay``
+        Writing a stroke into the mask and overlay.
+    ``refresh_overlay``
+        Recoloring the whole overlay from the mask.
+    ``set_data``
+        Handing new image and overlay data to matplotlib.
+    ``draw``
+        Blitting a stroke, or the time from requesting a full draw until it
+        finished.
+
+    Parameters
+    ----------
+    maxlen : int, default 10_000
+        How many of the most recent timings of each hot path to keep for
+        computing percentiles.
+    """
+
+    def __init__(self, maxlen: int = 10_000):
+        self._maxlen = maxlen
+        self._timings: defaultdict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=self._maxlen)
+        )
+        self._counts: defaultdict[str, int] = defaultdict(int)
+        self._callbacks: dict[int, Callable[[str, float, dict[str, Any]], None]] = {}
+        self._cids = itertools.count()
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[dict[str, Any]]:
+        """
+        Time the body of a with block and record it as *name*.
+
+        The dictionary that is yielded can be filled with extra information
+        to pass to the callbacks.
+        """
+        info: dict[str, Any] = {}
+        start = perf_counter()
+        yield info
+        self.record(name, perf_counter() - start, **info)
+
+    def record(self, name: str, seconds: float, **info: Any) -> None:
+        """Record that *name* took *seconds* and notify the callbacks."""
+        self._timings[name].append(seconds)
+        self._counts[name] += 1
+        for callback in list(self._callbacks.values()):
+            callback(name, seconds, info)
+
+    def connect(self, callback: Callable[[str, float, dict[str, Any]], None]) -> int:
+        """
+        Call *callback* every time a timing is recorded.
+
+        Parameters
+        ----------
+        callback : callable
+            Called as ``callback(name, seconds, info)`` where *info* is a dict of
+            extra information such as the number of pixels in a stroke.
+
+        Returns
+        -------
+        int
+            A connection id that can be passed to `disconnect`.
+        """
+        cid = next(self._cids)
+        self._callbacks[cid] = callback
+        return cid
+
+    def disconnect(self, cid: int) -> None:
+        """Remove a callback added with `connect`."""
+        self._callbacks.pop(cid, None)
+
+    def stats(self) -> dict[str, TimingStats]:
+        """
+        Summarize the timings of each hot path.
+
+        Returns
+        -------
+        dict[str, TimingStats]
+            The *count* of all calls, and the median (*p50*), 95th percentile
+            (*p95*) and *max* in seconds of the most recent *maxlen* calls.
+        """
+        stats = {}
+        for name, timings in self._timings.items():
+            p50, p95 = np.percentile(timings, [50, 95])
+            stats[name] = TimingStats(
+                self._counts[name], float(p50), float(p95), max(timings)
+            )
+        return stats
+
+    def reset(self) -> None:
+        """Forget all the timings recorded so far."""
+        self._timings.clear()
+        self._counts.clear()
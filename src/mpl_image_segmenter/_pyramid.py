@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def halve(image: np.ndarray) -> np.ndarray:
+    """
+    Downsample an image by a factor of two along its first two axes.
+
+    Each pixel of the result is the mean of a 2x2 block of *image*. Odd sizes
+    are rounded up by repeating the last row or column, so that pixel ``i``
+    of the result always covers pixels ``2 * i`` and ``2 * i + 1``.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        An image of shape (Y, X) or (Y, X, C).
+
+    Returns
+    -------
+    np.ndarray
+        The downsampled image with the same dtype as *image*.
+    """
+    pad = [(0, image.shape[0] % 2), (0, image.shape[1] % 2)]
+    if any(after for _, after in pad):
+        image = np.pad(image, pad + [(0, 0)] * (image.ndim - 2), mode="edge")
+    y, x = image.shape[:2]
+    blocks = image.reshape(y // 2, 2, x // 2, 2, *image.shape[2:])
+    mean = blocks.mean(axis=(1, 3))
+    if image.dtype.kind in "biu":
+        mean = np.rint(mean)
+    halved: np.ndarray = mean.astype(image.dtype, copy=False)
+    return halved
+
+
+class Pyramid:
+    """
+    An image along with copies of it downsampled by successive factors of two.
+
+    Level ``k`` is downsampled by ``2**k`` with `halve`. Levels are only
+    computed the first time they are needed.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        The full resolution image, of shape (Y, X) or (Y, X, C).
+    n_levels : int
+        How many levels there are, including the full resolution image.
+    """
+
+    def __init__(self, image: np.ndarray, n_levels: int):
+        self.n_levels = n_levels
+        self._levels = [image]
+
+    def __len__(self) -> int:
+        return self.n_levels
+
+    def __getitem__(self, level: int) -> np.ndarray:
+        if not 0 <= level < self.n_levels:
+            raise IndexError(
+                f"level {level} is out of range for {self.n_levels} levels"
+            )
+        while len(self._levels) <= level:
+            self._levels.append(halve(self._levels[-1]))
+        return self._levels[level]
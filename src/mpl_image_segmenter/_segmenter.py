@@ -1,19 +1,89 @@
 from __future__ import annotations
 
+import os
+import weakref
+from contextlib import nullcontext
+from functools import lru_cache
 from numbers import Integral
+from time import perf_counter
 from typing import TYPE_CHECKING
 
 import numpy as np
 from matplotlib import __version_info__ as mpl_version_info
 from matplotlib import get_backend
-from matplotlib.colors import TABLEAU_COLORS, XKCD_COLORS, to_rgba_array
+from matplotlib.colors import (
+    TABLEAU_COLORS,
+    XKCD_COLORS,
+    BoundaryNorm,
+    ListedColormap,
+    to_rgba_array,
+)
 from matplotlib.path import Path
-from matplotlib.pyplot import ioff, subplots
-from matplotlib.widgets import LassoSelector
-from mpl_pan_zoom import PanManager, zoom_factory
+from matplotlib.transforms import Affine2D
+
+from ._autosave import Autosaver
+from ._cache import CacheInfo, FrameCache
+from ._encoding import SparseMask
+from ._history import StrokeHistory
+from ._interpolate import interpolate_labels
+from ._lazy import PaddedStack, is_lazy_array
+from ._polygons import mask_to_polygons
+from ._profiling import HotPathProfiler
+from ._pyramid import Pyramid
+from ._rasterize import RASTERIZERS, rasterize
+from ._simplify import simplify
+from ._storage import flush_rows, open_mask_file
+from ._tiled import TiledMask
 
 if TYPE_CHECKING:
-    from typing import Any
+    from typing import Any, ContextManager
+
+    from matplotlib.image import AxesImage
+    from mpl_pan_zoom import PanManager
+
+    from ._history import Stroke
+    from ._polygons import Polygons
+    from ._storage import PathLike
+
+_NOT_PROFILING = nullcontext()
+
+
+@lru_cache(maxsize=None)
+def _palette(name: str) -> np.ndarray:
+    """Get the RGBA colors of a named palette, converting them only once."""
+    colors = TABLEAU_COLORS if name == "tableau" else XKCD_COLORS
+    palette = to_rgba_array(list(colors))
+    palette.flags.writeable = False
+    return palette
+
+
+def _default_colors(n_classes: int) -> np.ndarray:
+    if n_classes <= 10:
+        # There are only 10 tableau colors
+        return _palette("tableau")[:n_classes]
+    # up to 949 classes. Hopefully that is always enough....
+    return _palette("xkcd")[:n_classes]
+
+
+def _resolve_mask_dtype(n_classes: int, mask_dtype: Any) -> np.dtype:
+    """Get the dtype to store the mask with, checking that it can hold every class."""
+    if mask_dtype is None:
+        return np.min_scalar_type(n_classes)
+    dtype: np.dtype = np.dtype(mask_dtype)
+    if dtype.kind not in "ui":
+        raise TypeError(f"mask_dtype must be an integer type - got {dtype}")
+    if np.iinfo(dtype).max < n_classes:
+        raise ValueError(f"mask_dtype {dtype} cannot hold {n_classes} classes")
+    return dtype
+
+
+def _covers(shown: slice, visible: slice, wanted: slice) -> bool:
+    """Whether *shown* includes *visible* without being twice as long as *wanted*."""
+    return bool(
+        shown.start <= visible.start
+        and visible.stop <= shown.stop
+        and shown.stop - shown.start <= 2 * (wanted.stop - wanted.start)
+    )
 
 
 class ImageSegmenter:
@@ -32,6 +102,21 @@ class ImageSegmenter:
         pan_mousebutton="middle",
         ax=None,
         figsize=(10, 10),
+        rasterizer="matplotlib",
+        mask_dtype=None,
+        cache_size=0,
+        prefetch=0,
+        mask_file=None,
+        undo_budget=64 * 2**20,
+        pyramid_levels=1,
+        crop_to_view=False,
+        view_margin=0.5,
+        autosave=None,
+        autosave_interval=None,
+        overlay="rgba",
+        simplify_tolerance=0,
+        lasso_max_fps=None,
+        mask_tile_size=None,
         **kwargs,
     ):
         """
@@ -40,14 +125,24 @@ class ImageSegmenter:
         Parameters
         ----------
         imgs : array_like
-            A single image, or a stack of images shape (N, Y, X)
+            A single image, or a stack of images shape (N, Y, X). Objects that
+            have ``shape`` and ``dtype`` attributes and can be indexed along the
+            first axis, e.g. a `numpy.memmap`, an ``h5py.Dataset`` or a
+            ``zarr.Array``, are not loaded into memory. Only the image being
+            displayed is read.
         classes : int, iterable[string], default 1
             If a number How many classes to have in the mask.
         color_image : bool, default False
             If True treat the final dimension of `imgs` as the RGB(A) axis.
             Allows for shapes like ([N], Y, X, [3,4])
         mask : arraylike, optional
-            If you want to pre-seed the mask
+            If you want to pre-seed the mask. It is used as is if it already has
+            dtype *mask_dtype* and is writeable, otherwise it is copied and cast
+            to *mask_dtype*. Like *imgs*
+            this can be a lazily indexed array, but it must also support
+            assignment to regions of the mask and already have *mask_dtype*. A
+            `SparseMask`, e.g. made from run length encoded masks, is decoded
+            directly into *mask_dtype*.
         mask_colors : None, color, or array of colors, optional
             the colors to use for each class. Unselected regions will always be
             totally transparent
@@ -66,13 +161,104 @@ class ImageSegmenter:
             The axis on which to plot. If *None* a new figure will be created.
         figsize : (float, float), optional
             passed to plt.figure. Ignored if *ax* is given.
+        rasterizer : {"matplotlib", "scanline"}, default "matplotlib"
+            How to find the pixels inside the lasso. "matplotlib" tests each pixel
+            with `~matplotlib.path.Path.contains_points`. "scanline" fills rows of
+            pixels directly from the edges of the lasso, which selects the same
+            pixels but is much faster for large selections.
+        mask_dtype : dtype, optional
+            The integer dtype used to store the mask. If None the smallest unsigned
+            integer type that can hold all of the classes is used, e.g. uint8 for
+            fewer than 256 classes.
+        cache_size : int, default 0
+            How many images, and their overlays, to keep in memory so that switching
+            back to them with `image_index` is fast. 0 disables the cache. Cached
+            overlays are recomputed after `mask` is accessed or set, as the mask
+            may have been edited in place. Only the images are reused then.
+        prefetch : int, default 0
+            How many images on either side of the current one to load in the
+            background. Requires *cache_size* to be at least ``2 * prefetch + 1``.
+        mask_file : str or path-like, optional
+            A ``.npy`` file to keep the mask in instead of memory. If it exists it
+            must hold a mask of the right shape and *mask_dtype*, which is used as
+            the initial mask. Otherwise it is created, filled with zeros. The
+            rows changed by each stroke are flushed to disk straight away. Cannot
+            be combined with *mask*.
+        undo_budget : int, default 64 MiB
+            How many bytes to spend on undoing strokes with `undo`. Each stroke
+            keeps a copy of the mask inside its bounding box. When they add up to
+            more than this the oldest strokes can no longer be undone. Only these
+            copies are bounded, the vertices of every stroke (16 bytes each) are
+            kept for `get_paths` and the autosave, so they grow with the session.
+        pyramid_levels : int, default 1
+            How many levels of an image pyramid to display the image and overlay
+            with. Level ``k`` is downsampled by ``2**k``, and the level that best
+            matches the resolution of the screen at the current zoom is used.
+            Only the visible part of that level is given to matplotlib, so panning
+            and zooming very large images stays fast. Strokes still always edit
+            the full resolution mask. The default of 1 always displays the full
+            images. When greater than 1 the axes are not autoscaled and strokes
+            redraw the whole axes rather than blitting.
+        crop_to_view : bool, default False
+            Only give the visible part of the image and overlay to matplotlib,
+            so that drawing costs scale with the size of the view rather than the
+            image. This is always done when *pyramid_levels* is greater than 1,
+            and has the same caveats.
+        view_margin : float, default 0.5
+            When cropping, how much of the image beyond each edge of the view to
+            include, as a fraction of the size of the view. Panning within the
+            margin doesn't need the cropped region to be updated.
+        autosave : str or path-like, optional
+            A directory to save the mask and strokes to in the background. Only
+            the masks of images that were changed are written, each to its own
+            file, and a crash never leaves a half written file. If the directory
+            already holds a saved mask it is used as the initial mask and its
+            strokes are returned by `get_paths`, in which case *mask* cannot be
+            given. Edits made in place through `mask` are only saved once the
+            image is changed by a stroke. Cannot be combined with *mask_file*.
+        autosave_interval : float, optional
+            How many seconds to wait between saves. By default the changes are
+            saved after every stroke. Changes that are waiting for the next save
+            are saved when the figure is closed or `wait_for_autosave` is called.
+        overlay : {"rgba", "labels"}, default "rgba"
+            How the mask is drawn. "rgba" keeps an RGBA image colored from the
+            mask up to date. "labels" shows the mask of the current image
+            directly, colored by a colormap made from *mask_colors*, so no color
+            image has to be kept in sync and changing *mask_colors* or
+            *mask_alpha* only changes the colormap. The mask is always drawn with
+            nearest neighbour interpolation then.
+        simplify_tolerance : float, default 0
+            How far, in pixels, the lasso may be moved to drop vertices from it
+            before finding the pixels inside it. Slowly drawn lassos can have
+            thousands of nearly collinear vertices, and finding the pixels inside
+            takes time proportional to the number of vertices. The simplified
+            lasso is always within *simplify_tolerance* of the drawn one, so only
+            pixels whose centres are that close to the drawn lasso can be
+            selected differently. The simplified lassos are the ones returned by
+            `get_paths`. 0 keeps every vertex.
+        lasso_max_fps : float, optional
+            The most times per second to redraw the lasso while it is being
+            drawn. Each redraw takes time proportional to the number of vertices,
+            so limiting them keeps long strokes responsive. Every mouse position
+            is still part of the lasso. By default the lasso is redrawn on every
+            mouse movement.
+        mask_tile_size : int, optional
+            Store the mask in square tiles of this size, e.g. 256, that are only
+            allocated once they are drawn on, so that the memory used scales
+            with the area that has been annotated rather than the size of the
+            stack. Reading `mask` converts it to a single array, as it may be
+            edited in place, and setting `mask` splits it into tiles again.
+            Cannot be combined with *mask_file*. By default the mask is a single
+            array.
         **kwargs
             All other kwargs will passed to the imshow command for the image
         """
-        # ensure mask colors is iterable and the same length as the number of classes
-        # choose colors from default color cycle?
-
-        self.mask_alpha = mask_alpha
+        if overlay not in ("rgba", "labels"):
+            raise ValueError(f"overlay must be 'rgba' or 'labels' - got {overlay!r}")
+        self._overlay_mode = overlay
+        self._mask_alpha: float = mask_alpha
+        self.rasterizer = rasterizer
+        self.simplify_tolerance = simplify_tolerance
 
         if isinstance(classes, Integral):
             self._classes: list[str | int] = list(range(classes))
@@ -80,106 +266,390 @@ class ImageSegmenter:
             self._classes = classes
         self._n_classes = len(self._classes)
         if mask_colors is None:
-            if self._n_classes <= 10:
-                # There are only 10 tableau colors
-                self.mask_colors = to_rgba_array(
-                    list(TABLEAU_COLORS)[: self._n_classes]
-                )
-            else:
-                # up to 949 classes. Hopefully that is always enough....
-                self.mask_colors = to_rgba_array(list(XKCD_COLORS)[: self._n_classes])
-        else:
-            self.mask_colors = to_rgba_array(np.atleast_1d(mask_colors))
-            # should probably check the shape here
-        self.mask_colors[:, -1] = self.mask_alpha
+            mask_colors = _default_colors(self._n_classes)
+        self.mask_colors = mask_colors
+
+        self._mask_dtype = _resolve_mask_dtype(self._n_classes, mask_dtype)
+        self._mask_tile_size = mask_tile_size
 
-        imgs = np.asanyarray(imgs)
         self._imgs = self._pad_to_stack(imgs, "imgs", color_image)
         self._color_image = color_image
 
         self._image_index = 0
+        self._profiler: HotPathProfiler | None = None
+        self._draw_requested: float | None = None
+        self._setup_frame_cache(cache_size, prefetch)
 
-        self._overlay = np.zeros((*self._imgs.shape[1:3], 4))
+        self._overlay = self._empty_overlay()
+        self._class_counts: np.ndarray | None = None
+        self._history = StrokeHistory(undo_budget)
+        # an array, a memmap, a TiledMask or a lazily indexed stack
+        self._mask: Any
+        recovered = self._setup_autosave(autosave, mask, mask_file)
+        self._setup_mask(mask if recovered is None else recovered, mask_file)
         if mask is None:
-            self.mask = np.zeros(self._imgs.shape[:3])
-        else:
-            self.mask = self._pad_to_stack(mask, "mask", False)
-            self._refresh_overlay_values()
+            # only a mask that was passed in needs saving, not zeros or a recovered one
+            self._unsaved.clear()
 
         if ax is not None:
             self.ax = ax
             self.fig = self.ax.figure
         else:
+            # imported here so that importing this package doesn't import pyplot
+            from matplotlib.pyplot import ioff, subplots
+
             with ioff():
                 self.fig, self.ax = subplots(figsize=figsize)
-        self._displayed = self.ax.imshow(self._imgs[self._image_index], **kwargs)
-        self._mask_im = self.ax.imshow(self._overlay)
+        frame = self._frame(self._image_index)
+        self._displayed = self.ax.imshow(frame, **kwargs)
+        self._mask_im = self._show_overlay()
+        self._setup_view(pyramid_levels, crop_to_view, view_margin, frame)
 
-        default_props = {"color": "black", "linewidth": 1, "alpha": 0.8}
-        if props is None:
-            props = default_props
+        # the widgets are only needed once there is a figure
+        from mpl_pan_zoom import PanManager, zoom_factory
 
-        useblit = False if "ipympl" in get_backend().lower() else True
         button_dict = {"left": 1, "middle": 2, "right": 3}
         if isinstance(pan_mousebutton, str):
             pan_mousebutton = button_dict[pan_mousebutton.lower()]
         if isinstance(lasso_mousebutton, str):
             lasso_mousebutton = button_dict[lasso_mousebutton.lower()]
-
-        if mpl_version_info < (3, 7):
-            self.lasso = LassoSelector(
-                self.ax,
-                self._onselect,
-                lineprops=props,
-                useblit=useblit,
-                button=lasso_mousebutton,
-            )
-        else:
-            self.lasso = LassoSelector(
-                self.ax,
-                self._onselect,
-                props=props,
-                useblit=useblit,
-                button=lasso_mousebutton,
-            )
-        self.lasso.set_visible(True)
-
-        # offset shape by 1 because we always pad into
-        # being a stack (N, Y, X, [3,4])
-        pix_x = np.arange(self._imgs.shape[1])
-        pix_y = np.arange(self._imgs.shape[2])
-        xv, yv = np.meshgrid(pix_y, pix_x)
-        self.pix = np.vstack((xv.flatten(), yv.flatten())).T
+        self._setup_lasso(props, lasso_mousebutton, lasso_max_fps)
 
         self._pm = PanManager(self.fig, button=pan_mousebutton)
         self.disconnect_zoom = zoom_factory(self.ax)
         self.current_class = 1
         self._erasing = False
-        self._paths: dict[str, list[Path]] = {"adding": [], "erasing": []}
+        self._prefetch_neighbours(self._image_index)
+        self._start_autosave_timer(autosave_interval)
+
+    def _setup_lasso(
+        self, props: dict[str, Any] | None, button: int, max_fps: float | None
+    ) -> None:
+        from ._lasso import ThrottledLasso
+
+        if props is None:
+            props = {"color": "black", "linewidth": 1, "alpha": 0.8}
+        useblit = False if "ipympl" in get_backend().lower() else True
+        props_kwarg = "lineprops" if mpl_version_info < (3, 7) else "props"
+        self.lasso = ThrottledLasso(
+            self.ax,
+            self._onselect,
+            useblit=useblit,
+            button=button,
+            max_fps=max_fps,
+            **{props_kwarg: props},
+        )
+        self.lasso.set_visible(True)
+
+    def _setup_view(
+        self,
+        pyramid_levels: int,
+        crop_to_view: bool,
+        view_margin: float,
+        frame: np.ndarray,
+    ) -> None:
+        if pyramid_levels < 1:
+            raise ValueError(
+                f"pyramid_levels must be at least 1 - got {pyramid_levels}"
+            )
+        if view_margin < 0:
+            raise ValueError(f"view_margin cannot be negative - got {view_margin}")
+        self._pyramid_levels = pyramid_levels
+        self._view_margin = view_margin
+        # the (level, rows, cols) of the pyramid given to the artists
+        self._view: tuple[int, slice, slice] | None = None
+        self._frame_pyramid: Pyramid | None = None
+        if pyramid_levels == 1 and not crop_to_view:
+            return
+        self._frame_pyramid = Pyramid(frame, pyramid_levels)
+        # the artists only cover part of the image so they mustn't set the limits
+        self.ax.set_autoscale_on(False)
+        self.ax.callbacks.connect("xlim_changed", self._on_view_changed)
+        self.ax.callbacks.connect("ylim_changed", self._on_view_changed)
+        self.fig.canvas.mpl_connect("resize_event", self._on_view_changed)
+        self._render_view()
+
+    def _setup_autosave(
+        self, autosave: PathLike | None, mask: Any, mask_file: PathLike | None
+    ) -> np.ndarray | None:
+        """Start autosaving, returning the mask that was saved before if any."""
+        # images whose mask changed since the last save
+        self._unsaved: set[int] = set()
+        self._autosaver: Autosaver | None = None
+        self._autosave_timer: Any = None
+        if autosave is None:
+            return None
+        if mask_file is not None:
+            raise ValueError("Only one of mask_file and autosave can be given")
+        self._autosaver = Autosaver(autosave, self._imgs.shape[:3], self._mask_dtype)
+        weakref.finalize(self, self._autosaver.close)
+        saved, strokes = self._autosaver.load()
+        if saved is not None and mask is not None:
+            raise ValueError(
+                f"{os.fspath(autosave)} already holds a saved mask so mask cannot"
+                " be given"
+            )
+        if strokes is not None:
+            self._history.from_arrays(strokes)
+        return saved
+
+    def _start_autosave_timer(self, interval: float | None) -> None:
+        if self._autosaver is None:
+            return
+        # don't let the timer or the figure keep the segmenter alive
+        save = weakref.WeakMethod(self._autosave)
+        flush = weakref.WeakMethod(self.wait_for_autosave)
+
+        def on_timer() -> None:
+            method = save()
+            if method is not None:
+                method()
+
+        def on_close(_: Any) -> None:
+            method = flush()
+            if method is not None:
+                method()
+
+        # save what is waiting for the timer when the figure is closed
+        self.fig.canvas.mpl_connect("close_event", on_close)
+        if interval is None:
+            return
+        self._autosave_timer = self.fig.canvas.new_timer(interval=int(interval * 1000))
+        self._autosave_timer.add_callback(on_timer)
+        self._autosave_timer.start()
+
+    def _autosave(self) -> None:
+        """Hand copies of the unsaved masks and the strokes to the autosaver."""
+        if self._autosaver is None or not self._unsaved:
+            return
+        # copy so that strokes made while writing don't tear the saved masks
+        slices = {i: np.array(self._mask[i]) for i in self._unsaved}
+        self._unsaved.clear()
+        self._autosaver.save(slices, *self._history.take_unsaved())
+
+    def wait_for_autosave(self) -> None:
+        """Wait until all the changes saved so far have been written to disk."""
+        if self._autosaver is not None:
+            self._autosave()
+            self._autosaver.wait()
+
+    def _setup_mask(self, mask: Any, mask_file: PathLike | None) -> None:
+        self._mask_file: np.memmap | None = None
+        if mask_file is not None:
+            if mask is not None:
+                raise ValueError("Only one of mask and mask_file can be given")
+            if self._mask_tile_size is not None:
+                raise ValueError(
+                    "Only one of mask_tile_size and mask_file can be given"
+                )
+            # always store a stack, even for a single image
+            shape = self._imgs.shape[:3]
+            self.mask = open_mask_file(mask_file, shape, self._mask_dtype)
+            self._mask_file = self._mask
+        elif mask is None and self._mask_tile_size is not None:
+            self.mask = TiledMask(
+                self._imgs.shape[:3], self._mask_dtype, self._mask_tile_size
+            )
+        elif mask is None:
+            self.mask = np.zeros(self._imgs.shape[:3], dtype=self._mask_dtype)
+        else:
+            self.mask = mask
 
     def _refresh_overlay_values(self) -> None:
         # leave the actual updating of image to other code
         # in order to easily manage what gets updated and when
         # the drawing happens
-        for i in range(self._n_classes + 1):
-            idx = self._mask[self._image_index] == i
-            if i == 0:
-                self._overlay[idx] = [0, 0, 0, 0]
+        with self._profile("refresh_overlay"):
+            if self._overlay_mode == "labels":
+                self._overlay = self._labels(self._image_index)
             else:
-                self._overlay[idx] = self.mask_colors[i - 1]
+                self._overlay_values(self._image_index, self._overlay)
+
+    def _show_overlay(self) -> AxesImage:
+        kwargs: dict[str, Any] = {}
+        if self._overlay_mode == "labels":
+            kwargs = {
+                "cmap": self._overlay_cmap(),
+                "norm": BoundaryNorm(
+                    np.arange(self._n_classes + 2) - 0.5, self._n_classes + 1
+                ),
+                "interpolation": "nearest",
+            }
+        im: AxesImage = self.ax.imshow(self._overlay, **kwargs)
+        return im
+
+    def _empty_overlay(self) -> np.ndarray:
+        if self._overlay_mode == "labels":
+            return np.zeros(self._imgs.shape[1:3], dtype=self._mask_dtype)
+        return np.zeros((*self._imgs.shape[1:3], 4), dtype=np.uint8)
+
+    def _labels(self, index: int) -> np.ndarray:
+        """Get the mask of an image to show with the "labels" overlay."""
+        if isinstance(self._mask, np.ndarray):
+            # a view so that strokes update it for free
+            view: np.ndarray = self._mask[index]
+            return view
+        return np.asarray(self._mask[index])
+
+    def _overlay_cmap(self) -> ListedColormap:
+        # the background is transparent
+        return ListedColormap(np.vstack([[0, 0, 0, 0], self._mask_colors]))
+
+    def _overlay_values(self, index: int, out: np.ndarray) -> None:
+        if isinstance(self._mask, TiledMask):
+            # only the allocated tiles aren't background
+            out[...] = self._color_lut()[0]
+            for window, tile in self._mask.tiles(index):
+                out[window] = np.take(
+                    self._color_lut(), tile.astype(np.intp), axis=0, mode="clip"
+                )
+            return
+        # look up the color of every pixel at once rather than looping over classes
+        np.take(
+            self._color_lut(),
+            np.asarray(self._mask[index]).astype(np.intp, copy=False),
+            axis=0,
+            out=out,
+            mode="clip",
+        )
+
+    def _setup_frame_cache(self, cache_size: int, prefetch: int) -> None:
+        if prefetch and cache_size < 2 * prefetch + 1:
+            raise ValueError(
+                f"cache_size must be at least {2 * prefetch + 1} to prefetch"
+                f" {prefetch} images on either side of the current image"
+            )
+        self._prefetch = prefetch
+        # bumped whenever the mask may have changed outside of a stroke
+        # so that cached overlays made before then get recomputed
+        self._mask_version = 0
+        self._frame_cache: FrameCache | None = None
+        if cache_size:
+            # Only hold a weak reference to the segmenter so that the cache and
+            # its threads don't keep it alive.
+            load = weakref.WeakMethod(self._load_frame)
+            self._frame_cache = FrameCache(lambda i: load()(i), cache_size)  # type: ignore
+            weakref.finalize(self, self._frame_cache.close)
+
+    def _load_frame(self, index: int) -> list[Any]:
+        # may be called from the prefetching threads
+        version = self._mask_version
+        if self._overlay_mode == "labels":
+            overlay = self._labels(index)
+        else:
+            overlay = np.empty((*self._imgs.shape[1:3], 4), dtype=np.uint8)
+            self._overlay_values(index, overlay)
+        return [self._frame(index), overlay, version]
+
+    def _prefetch_neighbours(self, index: int) -> None:
+        if self._frame_cache is None:
+            return
+        # nearest first so that they are loaded first
+        neighbours = []
+        for offset in range(1, self._prefetch + 1):
+            neighbours.extend([index + offset, index - offset])
+        self._frame_cache.prefetch(
+            [i for i in neighbours if 0 <= i < self._imgs.shape[0]]
+        )
+
+    def frame_cache_info(self) -> CacheInfo | None:
+        """
+        Get statistics about the cache of images used by `image_index`.
+
+        Returns
+        -------
+        CacheInfo or None
+            A named tuple of *hits*, *misses*, *maxsize* and *currsize*. None if
+            the segmenter was created with ``cache_size=0``. Switching to an image
+            that is still being prefetched waits for it and counts as a hit.
+        """
+        if self._frame_cache is None:
+            return None
+        return self._frame_cache.info()
+
+    def _color_lut(self) -> np.ndarray:
+        """Get the uint8 RGBA color of each mask value. 0 is always transparent."""
+        if not np.array_equal(self._lut_colors, self._mask_colors):
+            # mask_colors was edited in place
+            self._set_lut()
+            self._mask_version += 1
+        return self._lut
+
+    def _set_lut(self) -> None:
+        self._lut_colors = self._mask_colors.copy()
+        self._lut = np.zeros((self._n_classes + 1, 4), dtype=np.uint8)
+        self._lut[1:] = np.round(np.asarray(self._lut_colors) * 255)
+
+    @property
+    def mask_colors(self) -> np.ndarray:
+        """
+        The RGBA color of each class, shape (n_classes, 4).
+
+        Set this to change the colors, the alpha of every color is set to
+        `mask_alpha`. Extra colors are ignored. Changes made in place show the
+        next time the overlay is redrawn.
+        """
+        return self._mask_colors
+
+    @mask_colors.setter
+    def mask_colors(self, val: Any) -> None:
+        colors = to_rgba_array(np.atleast_1d(val))
+        if 1 < len(colors) < self._n_classes:
+            raise ValueError(
+                f"Expected 1 or at least {self._n_classes} mask colors"
+                f" - got {len(colors)}"
+            )
+        colors = np.broadcast_to(colors[: self._n_classes], (self._n_classes, 4)).copy()
+        colors[:, -1] = self._mask_alpha
+        self._mask_colors = colors
+        self._set_lut()
+        self._colors_changed()
+
+    @property
+    def mask_alpha(self) -> float:
+        """The alpha of the colors of every class."""
+        return self._mask_alpha
+
+    @mask_alpha.setter
+    def mask_alpha(self, val: float) -> None:
+        self._mask_alpha = val
+        self.mask_colors = self._mask_colors
+
+    def _colors_changed(self) -> None:
+        if not hasattr(self, "_mask_im"):
+            # still being created
+            return
+        if self._overlay_mode == "labels":
+            self._mask_im.set_cmap(self._overlay_cmap())
+        else:
+            # every cached overlay has the old colors
+            self._mask_version += 1
+            self._refresh_overlay_values()
+            self._set_artist_data()
+        self._request_draw()
+
+    def _frame(self, index: int) -> np.ndarray:
+        # only load the image being shown from lazily indexed stacks
+        return np.asarray(self._imgs[index])
 
     @staticmethod
-    def _pad_to_stack(arr: np.ndarray, name: str, color_image: bool) -> np.ndarray:
-        if color_image and arr.ndim < 3:
+    def _pad_to_stack(arr: Any, name: str, color_image: bool) -> Any:
+        # only look at the shape so that lazy arrays are never loaded
+        if not is_lazy_array(arr):
+            arr = np.asanyarray(arr)
+        ndim = len(arr.shape)
+        if color_image and ndim < 3:
             raise ValueError(
                 f"{name} must be at least 3 dimensional when *color_image* is True"
-                f" but it is {arr.ndim}D"
+                f" but it is {ndim}D"
             )
-        if arr.ndim == (2 + color_image):
+        if ndim == (2 + color_image):
             # make shape (1, M, N)
             #  or (1, M, N, [3, 4])
-            return arr[None, ...]
-        elif arr.ndim == (3 + color_image):
+            if isinstance(arr, np.ndarray):
+                return arr[None, ...]
+            return PaddedStack(arr)
+        elif ndim == (3 + color_image):
             return arr
         else:
             raise ValueError(
@@ -189,23 +659,104 @@ class ImageSegmenter:
 
     @property
     def mask(self) -> np.ndarray:
-        if self._mask.shape[0] == 1:
+        # the returned array may be edited in place so cached overlays and the
+        # class counts are stale
+        self._mask_version += 1
+        self._class_counts = None
+        if isinstance(self._mask, TiledMask):
+            # tiles can't be handed out to be edited in place
+            self._mask = np.asarray(self._mask)
+        mask: np.ndarray = self._mask
+        if mask.shape[0] == 1:
             # don't complicate things in the simple case of
             # one image
-            return self._mask[0]
-        else:
-            return self._mask
+            mask = mask[0]
+        return mask
 
     @mask.setter
-    def mask(self, val: np.ndarray) -> None:
-        val = self._pad_to_stack(np.asanyarray(val), "mask", False)
+    def mask(self, val: Any) -> None:
+        if isinstance(val, SparseMask):
+            # decode straight into the mask dtype rather than via a default one
+            val = val.to_dense(self._mask_dtype)
+        val = self._pad_to_stack(val, "mask", False)
         if self._color_image:
             compare_shape = self._imgs.shape[:-1]
         else:
             compare_shape = self._imgs.shape
         if val.shape != compare_shape:
             raise ValueError("Mask must have the same shape as imgs")
+        if self._mask_file is not None:
+            # keep using the file rather than switching to the new array
+            self._mask[...] = val
+            self._mask_file.flush()
+            self._mask_replaced()
+            return
+        if val.dtype != self._mask_dtype:
+            if not isinstance(val, np.ndarray):
+                # casting would load the whole mask into memory
+                raise TypeError(
+                    f"Lazily loaded masks must have dtype {self._mask_dtype}"
+                    f" - got {val.dtype}"
+                )
+            cast = val.astype(self._mask_dtype)
+            if not np.array_equal(cast, val):
+                raise ValueError(
+                    f"Mask values must be integers that fit in {self._mask_dtype}"
+                )
+            val = cast
+        elif isinstance(val, np.ndarray) and not val.flags.writeable:
+            # e.g. the shared example masks, strokes need to write to the mask
+            val = val.copy()
+        if self._mask_tile_size is not None and not isinstance(val, TiledMask):
+            val = TiledMask.from_dense(val, self._mask_tile_size)
         self._mask = val
+        self._mask_replaced()
+
+    def _mask_replaced(self) -> None:
+        self._mask_version += 1
+        self._class_counts = None
+        self._history.forget_patches()
+        self._unsaved.update(range(self._mask.shape[0]))
+        self._refresh_overlay_values()
+        if hasattr(self, "_mask_im"):
+            self._set_artist_data()
+            self._request_draw()
+
+    @property
+    def class_counts(self) -> np.ndarray:
+        """
+        How many pixels of each class every image has, shape (N, n_classes + 1).
+
+        Column 0 is the background. The counts are kept up to date by strokes,
+        undo and redo, so reading them is free. They are counted from scratch
+        the first time they are read after `mask` is set or accessed, as the
+        mask may have been edited in place. Values of the mask that aren't
+        classes aren't counted.
+        """
+        if self._class_counts is None:
+            self._class_counts = np.empty(
+                (self._mask.shape[0], self._n_classes + 1), dtype=np.int64
+            )
+            self._count_classes(range(self._mask.shape[0]))
+        counts = self._class_counts.view()
+        counts.flags.writeable = False
+        return counts
+
+    def _count_classes(self, indices: range) -> None:
+        """Recount the classes of whole images, if the counts are being kept."""
+        if self._class_counts is None:
+            return
+        for i in indices:
+            self._class_counts[i] = self._bincount(np.asarray(self._mask[i]))
+
+    def _bincount(self, labels: np.ndarray) -> np.ndarray:
+        n = self._n_classes + 1
+        flat = labels.reshape(-1).astype(np.intp, copy=False)
+        return np.bincount(flat, minlength=n)[:n]
+
+    @property
+    def mask_dtype(self) -> np.dtype:
+        return self._mask_dtype
 
     @property
     def image_index(self) -> int:
@@ -220,15 +771,61 @@ class ImageSegmenter:
                 f"Too large - This segmenter only has {self._imgs.shape[0]} images."
             )
         self._image_index = val
-        self._refresh_overlay_values()
-        self._displayed.set_data(self._imgs[val])
-        self._mask_im.set_data(self._overlay)
-        self.fig.canvas.draw_idle()
+        if self._frame_cache is None:
+            self._refresh_overlay_values()
+            frame = self._frame(val)
+        else:
+            # The cached overlay becomes the live one so strokes on this image
+            # also keep the cache up to date.
+            cached = self._frame_cache.get(val)
+            frame, self._overlay, version = cached
+            if version != self._mask_version:
+                self._refresh_overlay_values()
+                cached[1:] = [self._overlay, self._mask_version]
+            self._prefetch_neighbours(val)
+        self._set_artist_data(frame)
+        self._request_draw()
+
+    @property
+    def pix(self) -> np.ndarray:
+        """
+        The (x, y) coordinates of every pixel of an image, shape (Y * X, 2).
+
+        This is computed on every access. Selections only ever compute
+        the coordinates of the pixels near the lasso, so avoid using this
+        for large images.
+        """
+        # offset shape by 1 because we always pad into
+        # being a stack (N, Y, X, [3,4])
+        yv, xv = np.mgrid[: self._imgs.shape[1], : self._imgs.shape[2]]
+        return np.column_stack((xv.ravel(), yv.ravel()))
 
     @property
     def panmanager(self) -> PanManager:
         return self._pm
 
+    @property
+    def rasterizer(self) -> str:
+        return self._rasterizer
+
+    @rasterizer.setter
+    def rasterizer(self, val: str) -> None:
+        if val not in RASTERIZERS:
+            raise ValueError(
+                f"{val!r} is not a valid rasterizer. Choose one of {list(RASTERIZERS)}"
+            )
+        self._rasterizer = val
+
+    @property
+    def simplify_tolerance(self) -> float:
+        return self._simplify_tolerance
+
+    @simplify_tolerance.setter
+    def simplify_tolerance(self, val: float) -> None:
+        if val < 0:
+            raise ValueError(f"simplify_tolerance cannot be negative - got {val}")
+        self._simplify_tolerance = val
+
     @property
     def erasing(self) -> bool:
         return self._erasing
@@ -259,31 +856,436 @@ class ImageSegmenter:
                     " It cannot be 0 as 0 is the background."
                 )
 
-    def get_paths(self) -> dict[str, list[Path]]:
+    def to_polygons(
+        self, tolerance: float = 0, max_workers: int | None = None
+    ) -> dict[int, Polygons] | list[dict[int, Polygons]]:
+        """
+        Get the outlines of the regions of each class as polygons.
+
+        Unlike `get_paths` these are the final regions, after every stroke and
+        erase. See `mask_to_polygons` for the format.
+
+        Parameters
+        ----------
+        tolerance : float, default 0
+            How far the outlines may be simplified from the pixel edges.
+        max_workers : int, optional
+            The number of processes to outline a stack of images with.
+
+        Returns
+        -------
+        dict[int, Polygons] or list[dict[int, Polygons]]
+            The polygons of each class by mask value, or a list of them for each
+            image of a stack.
+        """
+        # read the mask directly so that a tiled mask isn't made into one array
+        mask = self._mask[0] if self._mask.shape[0] == 1 else self._mask
+        return mask_to_polygons(mask, tolerance=tolerance, max_workers=max_workers)
+
+    def get_paths(self, image_index: int | None = None) -> dict[str, list[Path]]:
         """
         Get a dictionary of all the paths used to create the mask.
 
+        Strokes that have been undone are not included.
+
+        Parameters
+        ----------
+        image_index : int, optional
+            Only get the paths drawn on this image. By default the paths drawn
+            on every image are returned.
+
         Returns
         -------
         dict :
             With keys *adding* and *erasing* each containing a list of paths.
         """
-        return self._paths
+        paths: dict[str, list[Path]] = {"adding": [], "erasing": []}
+        for stroke in self._history:
+            if image_index is None or stroke.image_index == image_index:
+                key = "erasing" if stroke.erasing else "adding"
+                paths[key].append(Path(self._history.vertices(stroke)))
+        return paths
 
-    def _onselect(self, verts: Any) -> None:
-        p = Path(verts)
-        indices = p.contains_points(self.pix, radius=0).reshape(self._mask.shape[1:3])
-        if self._erasing:
-            self._mask[self._image_index][indices] = 0
-            self._overlay[indices] = [0, 0, 0, 0]
-            self._paths["erasing"].append(p)
+    @property
+    def can_undo(self) -> bool:
+        return self._history.can_undo
+
+    @property
+    def can_redo(self) -> bool:
+        return self._history.can_redo
+
+    def undo(self) -> bool:
+        """
+        Undo the most recent stroke, whichever image it was drawn on.
+
+        Returns
+        -------
+        bool
+            False if there was nothing to undo.
+        """
+        if not self._history.can_undo:
+            return False
+        current = self._read_window(self._history.next_undo)
+        self._restore(*self._history.undo(current))
+        return True
+
+    def redo(self) -> bool:
+        """
+        Redo the most recently undone stroke.
+
+        Returns
+        -------
+        bool
+            False if there was nothing to redo.
+        """
+        if not self._history.can_redo:
+            return False
+        current = self._read_window(self._history.next_redo)
+        self._restore(*self._history.redo(current))
+        return True
+
+    def propagate_labels(self, source: int, start: int, stop: int) -> None:
+        """
+        Copy the labels of one image to a range of images.
+
+        This can't be undone, and strokes drawn before it can no longer be undone.
+
+        Parameters
+        ----------
+        source : int
+            The image to copy the labels of.
+        start, stop : int
+            Copy to the images from *start* up to but not including *stop*.
+        """
+        targets = range(self._imgs.shape[0])[start:stop]
+        if len(targets) == 0:
+            return
+        labels = np.asarray(self._mask[source])
+        self._mask[targets.start : targets.stop] = labels
+        self._images_changed(targets)
+
+    def interpolate_labels(self, first: int, last: int) -> None:
+        """
+        Fill in the labels of the images between two labelled images.
+
+        The shape of each class is interpolated between *first* and *last* from
+        the signed distance to its edge, so that a region grows, shrinks or moves
+        smoothly from one to the other. Regions that don't overlap at all can't
+        be interpolated between, and disappear in between instead.
+
+        This can't be undone, and strokes drawn before it can no longer be undone.
+
+        Parameters
+        ----------
+        first, last : int
+            The labelled images. Every image between them is replaced.
+        """
+        first, last = sorted((first, last))
+        if first < 0 or last >= self._imgs.shape[0]:
+            raise ValueError(
+                f"first and last must be images of this {self._imgs.shape[0]}"
+                " image segmenter"
+            )
+        if last - first < 2:
+            # there are no images in between
+            return
+        self._mask[first + 1 : last] = interpolate_labels(
+            np.asarray(self._mask[first]),
+            np.asarray(self._mask[last]),
+            last - first - 1,
+        )
+        self._images_changed(range(first + 1, last))
+
+    def _images_changed(self, indices: range) -> None:
+        """Update everything that depends on the masks of whole images."""
+        if len(indices) == 0:
+            return
+        if self._mask_file is not None:
+            self._mask_file.flush()
+        self._unsaved.update(indices)
+        self._mask_version += 1
+        self._count_classes(indices)
+        self._history.forget_patches()
+        # only the image on display needs to be recolored now
+        if self._image_index in indices:
+            self._refresh_overlay_values()
+            self._set_artist_data()
+            self._request_draw()
+        self._stroke_finished()
+
+    def _read_window(self, stroke: Stroke) -> np.ndarray:
+        rows, cols = stroke.window
+        # a copy, as a view of the mask would change with it
+        return np.array(self._mask[stroke.image_index, rows, cols])
+
+    def _restore(self, stroke: Stroke, patch: np.ndarray) -> None:
+        self._write_window(stroke.image_index, stroke.window, patch)
+        if stroke.image_index == self._image_index:
+            self._show_window(stroke.window)
+        self._stroke_finished()
+
+    def _stroke_finished(self) -> None:
+        if self._autosave_timer is None:
+            self._autosave()
+
+    def _write_window(
+        self, index: int, window: tuple[slice, slice], values: np.ndarray
+    ) -> None:
+        """Write *values* into *window* of an image's mask, overlay and counts."""
+        rows, cols = window
+        if self._class_counts is not None:
+            counts = self._class_counts[index]
+            counts -= self._bincount(np.asarray(self._mask[index, rows, cols]))
+            counts += self._bincount(values)
+        self._mask[index, rows, cols] = values
+        self._unsaved.add(index)
+        if self._mask_file is not None:
+            flush_rows(self._mask_file, index, rows)
+        if index == self._image_index:
+            if self._overlay_mode == "rgba":
+                if not np.array_equal(self._lut_colors, self._mask_colors):
+                    # mask_colors was edited in place, recolor all of the overlay
+                    self._colors_changed()
+                    return
+                values = values.astype(np.intp, copy=False)
+                self._overlay[window] = np.take(self._lut, values, axis=0, mode="clip")
+            elif not (
+                isinstance(self._mask, np.ndarray)
+                and np.may_share_memory(self._overlay, self._mask)
+            ):
+                self._overlay[window] = values
+        else:
+            # the overlay of that image may be cached
+            self._mask_version += 1
+
+    def _show_window(self, window: tuple[slice, slice]) -> None:
+        """Draw the changes to *window* of the overlay."""
+        start = perf_counter()
+        if self._blit_window(window):
+            if self._profiler is not None:
+                self._profiler.record("draw", perf_counter() - start)
         else:
-            self._mask[self._image_index][indices] = self._cur_class_idx
-            self._overlay[indices] = self.mask_colors[self._cur_class_idx - 1]
-            self._paths["adding"].append(p)
+            self._set_artist_data()
+            self._request_draw()
+
+    def _set_artist_data(self, frame: np.ndarray | None = None) -> None:
+        """Give the overlay, and *frame* if the image changed, to the artists."""
+        with self._profile("set_data"):
+            if self._frame_pyramid is None:
+                if frame is not None:
+                    self._displayed.set_data(frame)
+                self._mask_im.set_data(self._overlay)
+                return
+            if frame is not None:
+                self._frame_pyramid = Pyramid(frame, self._pyramid_levels)
+            self._render_view()
+
+    def _display_level(self) -> int:
+        """Get the pyramid level with about one pixel per screen pixel."""
+        bbox = self.ax.bbox
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+        # image pixels per screen pixel, the bbox is in pixels so includes the dpi
+        density = max(
+            abs(xlim[1] - xlim[0]) / max(bbox.width, 1),
+            abs(ylim[1] - ylim[0]) / max(bbox.height, 1),
+        )
+        level = int(np.log2(density)) if density > 1 else 0
+        return min(level, self._pyramid_levels - 1)
+
+    def _visible_range(
+        self, lims: tuple[float, float], level: int, size: int, margin: float = 0
+    ) -> slice:
+        """
+        Get the pixels of a level of the pyramid that are visible along an axis.
+
+        The range is extended on both sides by *margin* times its length.
+        """
+        scale = 2**level
+        # pixel i is centered on i so it covers i - 0.5 to i + 0.5
+        start = int(np.floor(min(lims) + 0.5)) // scale
+        stop = -(-int(np.ceil(max(lims) + 0.5)) // scale)
+        pad = int(np.ceil(margin * (stop - start)))
+        start, stop = start - pad, stop + pad
+        n = -(-size // scale)
+        start = min(max(start, 0), n - 1)
+        return slice(start, min(max(stop, start + 1), n))
+
+    def _render_view(self, data_changed: bool = True) -> None:
+        """
+        Show only the visible part of the image at the level for the zoom.
+
+        Unless *data_changed*, nothing is done if what was shown last time still
+        covers the view and is not much larger than it needs to be.
+        """
+        level = self._display_level()
+        ylim, xlim = self.ax.get_ylim(), self.ax.get_xlim()
+        ny, nx = self._imgs.shape[1:3]
+        rows = self._visible_range(ylim, level, ny, self._view_margin)
+        cols = self._visible_range(xlim, level, nx, self._view_margin)
+        if not data_changed and self._view is not None:
+            shown_level, shown_rows, shown_cols = self._view
+            visible_rows = self._visible_range(ylim, level, ny)
+            visible_cols = self._visible_range(xlim, level, nx)
+            if (
+                level == shown_level
+                and _covers(shown_rows, visible_rows, rows)
+                and _covers(shown_cols, visible_cols, cols)
+            ):
+                return
+        self._view = (level, rows, cols)
+        scale = 2**level
+        # striding the live overlay means strokes are always included
+        overlay = self._overlay[::scale, ::scale][rows, cols]
+        extent = (
+            cols.start * scale - 0.5,
+            cols.stop * scale - 0.5,
+            rows.stop * scale - 0.5,
+            rows.start * scale - 0.5,
+        )
+        for im, data in (
+            (self._displayed, self._frame_pyramid[level][rows, cols]),  # type: ignore
+            (self._mask_im, overlay),
+        ):
+            im.set_data(data)
+            im.set_extent(extent)
+
+    def _on_view_changed(self, _: Any) -> None:
+        self._render_view(data_changed=False)
+
+    def _onselect(self, verts: Any) -> None:
+        with self._profile("simplify") as info:
+            vertices = simplify(verts, self._simplify_tolerance)
+            p = Path(vertices)
+            if info is not None:
+                info["vertices"] = (len(verts), len(vertices))
+        # only the pixels in the bounding box of the path can be selected
+        # so restrict all the work to that window of the image
+        with self._profile("rasterize") as info:
+            window, indices = rasterize(p, self._mask.shape[1:3], self._rasterizer)
+            if info is not None:
+                info["window"] = indices.shape
+                info["pixels"] = int(np.count_nonzero(indices))
+        rows, cols = window
+        with self._profile("update_overlay"):
+            # a copy, as a view of the mask would change with it
+            before = np.array(self._mask[self._image_index, rows, cols])
+            mask = before.copy()
+            value = 0 if self._erasing else self._cur_class_idx
+            mask[indices] = value
+            self._history.append(
+                self._image_index, value, self._erasing, vertices, window, before
+            )
+            self._write_window(self._image_index, window, mask)
+        self._show_window(window)
+        self._stroke_finished()
+
+    def _profile(self, name: str) -> ContextManager[dict[str, Any] | None]:
+        # A shared nullcontext keeps the overhead negligible when not profiling.
+        # It yields None so that callers can skip gathering extra information.
+        if self._profiler is None:
+            return _NOT_PROFILING
+        return self._profiler.time(name)
 
-        self._mask_im.set_data(self._overlay)
+    def _request_draw(self) -> None:
+        if self._profiler is not None and self._draw_requested is None:
+            self._draw_requested = perf_counter()
         self.fig.canvas.draw_idle()
 
+    def _on_draw(self, event: Any) -> None:
+        if self._profiler is not None and self._draw_requested is not None:
+            self._profiler.record("draw", perf_counter() - self._draw_requested)
+        self._draw_requested = None
+
+    @property
+    def profiler(self) -> HotPathProfiler | None:
+        """The profiler created by `enable_profiling`, or None if not profiling."""
+        return self._profiler
+
+    def enable_profiling(self, maxlen: int = 10_000) -> HotPathProfiler:
+        """
+        Start timing the hot paths of drawing and switching images.
+
+        Parameters
+        ----------
+        maxlen : int, default 10_000
+            How many of the most recent timings of each hot path to keep.
+
+        Returns
+        -------
+        HotPathProfiler
+            Use its ``stats`` method to summarize the timings, and its
+            ``connect`` method to be notified of each timing.
+        """
+        if self._profiler is None:
+            self._profiler = HotPathProfiler(maxlen)
+            self._draw_cid = self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        return self._profiler
+
+    def disable_profiling(self) -> None:
+        """Stop timing the hot paths."""
+        if self._profiler is not None:
+            self.fig.canvas.mpl_disconnect(self._draw_cid)
+        self._profiler = None
+        self._draw_requested = None
+
+    def _lasso_background(self) -> Any:
+        if hasattr(self.lasso, "_load_blit_background"):
+            return self.lasso._load_blit_background()
+        return getattr(self.lasso, "background", None)
+
+    def _set_lasso_background(self, background: Any) -> None:
+        if hasattr(self.lasso, "_save_blit_background"):
+            self.lasso._save_blit_background(background)
+        else:
+            self.lasso.background = background
+
+    def _blit_window(self, window: tuple[slice, slice]) -> bool:
+        """
+        Redraw only *window* of the image and overlay.
+
+        Rather than resampling the entire image and overlay the changed window of
+        both is drawn on top of the background the lasso saved, and that becomes
+        the new background. The full artists are updated in place so the next
+        full draw matches.
+
+        Returns
+        -------
+        bool
+            False if the canvas can't blit, in which case nothing was drawn.
+        """
+        background = self._lasso_background()
+        if not self.lasso.useblit or background is None:
+            return False
+        if self._frame_pyramid is not None:
+            # the artists only hold the visible part of the image
+            return False
+        canvas = self.fig.canvas
+        # this also removes the lasso line
+        canvas.restore_region(background)
+        rows, cols = window
+        if rows.stop > rows.start and cols.stop > cols.start:
+            from matplotlib.image import AxesImage
+
+            # set_data would copy the entire overlay and mark the figure as stale
+            self._mask_im.get_array()[window] = self._overlay[window]  # type: ignore
+            self._mask_im._imcache = None  # type: ignore
+            offset = Affine2D().translate(cols.start, rows.start) + self.ax.transData
+            for im in (self._displayed, self._mask_im):
+                patch = AxesImage(
+                    self.ax,
+                    cmap=im.get_cmap(),
+                    norm=im.norm,  # type: ignore
+                    interpolation=im.get_interpolation(),
+                    alpha=im.get_alpha(),
+                )
+                patch.set_data(im.get_array()[window])  # type: ignore
+                patch.set_transform(offset)
+                patch.set_clip_path(self.ax.patch)
+                patch.set_figure(self.fig)
+                self.ax.draw_artist(patch)
+        self._set_lasso_background(canvas.copy_from_bbox(self.ax.bbox))
+        canvas.blit(self.ax.bbox)
+        return True
+
     def _ipython_display_(self) -> None:
         display(self.fig.canvas)  # type: ignore # noqa: F821
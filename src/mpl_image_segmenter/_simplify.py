@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+
+def keep_vertices(
+    vertices: np.ndarray, firsts: np.ndarray, lasts: np.ndarray, tolerance: float
+) -> np.ndarray:
+    """
+    Choose the vertices to keep to simplify several polylines at once.
+
+    This is the Ramer-Douglas-Peucker algorithm, measuring the distance from
+    each vertex to the segment that would replace it rather than to the line
+    through that segment. So every point of each original polyline is within
+    *tolerance* of the simplified one, and vice versa. Every level of the
+    recursion is done for all the polylines in one vectorized pass.
+
+    Parameters
+    ----------
+    vertices : np.ndarray
+        The (N, 2) vertices of all of the polylines.
+    firsts, lasts : np.ndarray
+        The index of the first and last vertex of each polyline.
+    tolerance : float
+        How far the simplified polylines may be from the original ones.
+
+    Returns
+    -------
+    np.ndarray
+        Whether to keep each vertex. The first and last vertex of each polyline
+        are always kept.
+    """
+    keep = np.zeros(len(vertices), dtype=bool)
+    keep[firsts] = keep[lasts] = True
+    start, stop = np.asarray(firsts), np.asarray(lasts)
+    while True:
+        n_inner = stop - start - 1
+        split = n_inner > 0
+        start, stop, n_inner = start[split], stop[split], n_inner[split]
+        if len(start) == 0:
+            return keep
+        # the vertices between the ends of each segment, segment by segment
+        offsets = np.cumsum(n_inner) - n_inner
+        segment = np.repeat(np.arange(len(start)), n_inner)
+        inner = start[segment] + 1 + np.arange(len(segment)) - offsets[segment]
+
+        a = vertices[start]
+        ab = vertices[stop] - a
+        # e.g. the first and last vertex of a closed lasso are the same
+        length_sq = np.maximum(np.einsum("ij,ij->i", ab, ab), np.finfo(float).tiny)
+        ap = vertices[inner] - a[segment]
+        t = np.clip(np.einsum("ij,ij->i", ap, ab[segment]) / length_sq[segment], 0, 1)
+        off = ap - t[:, None] * ab[segment]
+        dist = np.hypot(off[:, 0], off[:, 1])
+
+        furthest = np.maximum.reduceat(dist, offsets)
+        # the first vertex that is the furthest from each segment
+        split_at = np.minimum.reduceat(
+            np.where(dist == furthest[segment], inner, len(vertices)), offsets
+        )
+        split = furthest > tolerance
+        keep[split_at[split]] = True
+        start, stop = (
+            np.r_[start[split], split_at[split]],
+            np.r_[split_at[split], stop[split]],
+        )
+
+
+def simplify(vertices: Any, tolerance: float) -> np.ndarray:
+    """
+    Remove vertices from a polyline while keeping its shape.
+
+    See `keep_vertices` for how. Every point of the original polyline is within
+    *tolerance* of the simplified one, and vice versa.
+
+    Parameters
+    ----------
+    vertices : array_like
+        The (N, 2) vertices.
+    tolerance : float
+        How far the simplified polyline may be from the original one. 0 or less
+        returns the vertices unchanged.
+
+    Returns
+    -------
+    np.ndarray
+        The vertices that were kept, always including the first and last.
+    """
+    verts = np.asarray(vertices, dtype=float)
+    if tolerance <= 0 or len(verts) < 3:
+        return verts
+    ends = np.array([0]), np.array([len(verts) - 1])
+    kept: np.ndarray = verts[keep_vertices(verts, *ends, tolerance)]
+    return kept
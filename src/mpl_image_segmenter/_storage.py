@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import mmap
+import os
+from typing import Union
+
+import numpy as np
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def open_mask_file(
+    path: PathLike, shape: tuple[int, ...], dtype: np.dtype
+) -> np.memmap:
+    """
+    Open a ``.npy`` file to store a mask in, creating it if it does not exist.
+
+    Parameters
+    ----------
+    path : str or path-like
+        The file to use.
+    shape : tuple of int
+        The shape of the mask.
+    dtype : dtype
+        The dtype of the mask.
+
+    Returns
+    -------
+    np.memmap
+        The mask. Creating a file fills it with zeros.
+    """
+    if not os.path.exists(path):
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    mask = np.lib.format.open_memmap(path, mode="r+")
+    if mask.shape != shape or mask.dtype != dtype:
+        raise ValueError(
+            f"{os.fspath(path)} holds a {mask.dtype} mask of shape {mask.shape}"
+            f" but a {dtype} mask of shape {shape} is needed"
+        )
+    return mask
+
+
+def flush_rows(mask: np.memmap, index: int, rows: slice) -> None:
+    """
+    Write some rows of one image of a memory mapped mask to disk.
+
+    Only the pages that hold those rows are flushed, rather than the
+    whole file.
+
+    Parameters
+    ----------
+    mask : np.memmap
+        The memory mapped mask of shape ([N], Y, X) as returned by
+        `open_mask_file`.
+    index : int
+        The image that was modified. Ignored for a single (Y, X) image.
+    rows : slice
+        The rows of that image that were modified.
+    """
+    if rows.stop <= rows.start:
+        return
+    # numpy keeps the underlying mmap.mmap private
+    mapping = getattr(mask, "_mmap", None)
+    if mapping is None:
+        mask.flush()
+        return
+    row_bytes = mask.shape[-1] * mask.itemsize
+    image_bytes = mask.shape[-2] * row_bytes
+    if mask.ndim == 2:
+        index = 0
+    # the mapping starts at the allocation boundary before the array data
+    start = mask.offset % mmap.ALLOCATIONGRANULARITY
+    start += index * image_bytes + rows.start * row_bytes
+    stop = start + (rows.stop - rows.start) * row_bytes
+    # msync needs the start to be aligned to a page
+    start -= start % mmap.PAGESIZE
+    mapping.flush(start, stop - start)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+
+def _axis_key(key: Any, size: int) -> tuple[int, int, bool]:
+    """Get the (start, stop) of an int or unit step slice, and whether it was an int."""
+    if isinstance(key, (int, np.integer)):
+        index = int(key) + size if key < 0 else int(key)
+        if not 0 <= index < size:
+            raise IndexError(f"index {key} is out of bounds for size {size}")
+        return index, index + 1, True
+    if isinstance(key, slice):
+        start, stop, step = key.indices(size)
+        if step != 1:
+            raise IndexError("Tiled masks can only be sliced with a step of 1")
+        return start, max(start, stop), False
+    raise IndexError(
+        f"Tiled masks can only be indexed by ints and slices - got {key!r}"
+    )
+
+
+class TiledMask:
+    """
+    A mask stack stored in square tiles, that are only allocated once written to.
+
+    Tiles that have never been written to are all background, so memory scales
+    with the area that has been annotated rather than the size of the stack.
+    Tiles that are erased back to all background are freed again. It can be
+    indexed with ints and slices like a numpy array, and is converted to one by
+    `numpy.asarray`. Tiles can be read from other threads while it is written
+    to, e.g. to prefetch overlays.
+
+    Parameters
+    ----------
+    shape : (int, int, int)
+        The shape (N, Y, X) of the mask stack.
+    dtype : dtype
+        The dtype of the mask.
+    tile_size : int, default 256
+        The height and width of the tiles. Tiles at the bottom and right edges
+        of the images are cut to fit.
+    """
+
+    def __init__(self, shape: tuple[int, ...], dtype: Any, tile_size: int = 256):
+        if len(shape) != 3:
+            raise ValueError(f"shape must be 3 dimensional - got {shape}")
+        if tile_size < 1:
+            raise ValueError(f"tile_size must be positive - got {tile_size}")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.tile_size = tile_size
+        self._tiles: dict[tuple[int, int, int], np.ndarray] = {}
+        # held while tiles are added or removed, and to copy the list of tiles
+        self._lock = threading.Lock()
+
+    @property
+    def ndim(self) -> int:
+        return 3
+
+    @property
+    def nbytes(self) -> int:
+        """How many bytes the allocated tiles take up."""
+        return sum(tile.nbytes for _, tile in self._items())
+
+    @classmethod
+    def from_dense(cls, mask: Any, tile_size: int = 256) -> TiledMask:
+        """Tile a mask stack, only keeping the tiles that aren't all background."""
+        tiled = cls(mask.shape, mask.dtype, tile_size)
+        for i in range(mask.shape[0]):
+            tiled[i] = np.asarray(mask[i])
+        return tiled
+
+    def _items(self) -> list[tuple[tuple[int, int, int], np.ndarray]]:
+        with self._lock:
+            return list(self._tiles.items())
+
+    def tiles(self, image: int) -> Iterator[tuple[tuple[slice, slice], np.ndarray]]:
+        """
+        Get the allocated tiles of an image.
+
+        Yields
+        ------
+        window : (slice, slice)
+            The rows and columns of the image the tile covers.
+        tile : np.ndarray
+            The tile itself, not a copy.
+        """
+        size = self.tile_size
+        for (i, ty, tx), tile in self._items():
+            if i == image:
+                rows = slice(ty * size, ty * size + tile.shape[0])
+                cols = slice(tx * size, tx * size + tile.shape[1])
+                yield (rows, cols), tile
+
+    def _split_key(self, key: Any) -> tuple[list[tuple[int, int]], list[bool]]:
+        if key is Ellipsis:
+            key = ()
+        elif not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError(f"too many indices for a 3 dimensional mask - got {key}")
+        key = key + (slice(None),) * (3 - len(key))
+        parsed = [_axis_key(k, n) for k, n in zip(key, self.shape)]
+        return [(start, stop) for start, stop, _ in parsed], [i for *_, i in parsed]
+
+    def _keys(
+        self, bounds: list[tuple[int, int]], allocated: bool
+    ) -> Iterable[tuple[int, int, int]]:
+        """Get the keys of the tiles in *bounds*, or only the allocated ones."""
+        size = self.tile_size
+        ranges = [range(*bounds[0])] + [
+            range(start // size, -(-stop // size)) for start, stop in bounds[1:]
+        ]
+        if allocated and np.prod([len(r) for r in ranges]) > len(self._tiles):
+            # quicker to look through the tiles than every position
+            return [
+                key
+                for key, _ in self._items()
+                if all(k in r for k, r in zip(key, ranges))
+            ]
+        return itertools.product(ranges[0], ranges[1], ranges[2])
+
+    def _overlap(
+        self, key: tuple[int, int, int], bounds: list[tuple[int, int]]
+    ) -> tuple[tuple[slice, slice], tuple[slice, slice]]:
+        """Get the window of a tile in *bounds* and the part of the tile in it."""
+        _, ty, tx = key
+        size = self.tile_size
+        (y0, y1), (x0, x1) = bounds[1:]
+        top, left = max(ty * size, y0), max(tx * size, x0)
+        bottom, right = min((ty + 1) * size, y1), min((tx + 1) * size, x1)
+        outer = (slice(top - y0, bottom - y0), slice(left - x0, right - x0))
+        inner = (
+            slice(top - ty * size, bottom - ty * size),
+            slice(left - tx * size, right - tx * size),
+        )
+        return outer, inner
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        bounds, is_int = self._split_key(key)
+        out = np.zeros([stop - start for start, stop in bounds], dtype=self.dtype)
+        for tile_key in self._keys(bounds, allocated=True):
+            tile = self._tiles.get(tile_key)
+            if tile is not None:
+                outer, inner = self._overlap(tile_key, bounds)
+                out[(tile_key[0] - bounds[0][0], *outer)] = tile[inner]
+        return out[tuple(0 if i else slice(None) for i in is_int)]
+
+    def __setitem__(self, key: Any, val: Any) -> None:
+        bounds, is_int = self._split_key(key)
+        shape = [stop - start for start, stop in bounds]
+        # line val up with the window, putting back the axes that ints index
+        val = np.broadcast_to(val, [n for n, i in zip(shape, is_int) if not i]).reshape(
+            shape
+        )
+        for tile_key in self._keys(bounds, allocated=False):
+            outer, inner = self._overlap(tile_key, bounds)
+            values = val[(tile_key[0] - bounds[0][0], *outer)]
+            background = not values.any()
+            tile = self._tiles.get(tile_key)
+            if tile is None:
+                if background:
+                    continue
+                tile = self._new_tile(tile_key)
+            tile[inner] = values
+            if background and not tile.any():
+                # erased back to background
+                with self._lock:
+                    del self._tiles[tile_key]
+
+    def _new_tile(self, key: tuple[int, int, int]) -> np.ndarray:
+        _, ty, tx = key
+        size = self.tile_size
+        tile = np.zeros(
+            (
+                min(size, self.shape[1] - ty * size),
+                min(size, self.shape[2] - tx * size),
+            ),
+            dtype=self.dtype,
+        )
+        with self._lock:
+            self._tiles[key] = tile
+        return tile
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        return np.asarray(self[...], dtype=dtype)
@@ -1,9 +1,16 @@
 """Example images for docs."""
 
+from __future__ import annotations
+
+import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 import numpy as np
 
+from .._storage import PathLike
+
 __all__ = [
     "gray_image_stack",
     "color_image_stack",
@@ -11,14 +18,60 @@ __all__ = [
 ]
 
 
-def gray_image_stack() -> np.ndarray:
+@lru_cache(maxsize=None)
+def _load(name: str, cache_dir: str | None) -> np.ndarray:
+    """Load an example array once, optionally via an uncompressed memory map."""
+    if cache_dir is not None:
+        cached = Path(cache_dir) / f"{name}.npy"
+        if not cached.exists():
+            os.makedirs(cache_dir, exist_ok=True)
+            # write then rename so that other processes never see half a file
+            tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, _load(name, None))
+            os.replace(tmp, cached)
+        mapped: np.ndarray = np.load(cached, mmap_mode="r")
+        return mapped
+    arr: np.ndarray = np.load(Path(__file__).parent / f"{name}.npz")["arr_0"]
+    arr.flags.writeable = False
+    return arr
+
+
+def _cache_key(cache_dir: PathLike | None) -> str | None:
+    return None if cache_dir is None else os.path.abspath(cache_dir)
+
+
+@lru_cache(maxsize=None)
+def _gray(dtype: np.dtype, cache_dir: str | None) -> np.ndarray:
+    # sum the channels as uint16 rather than taking a float64 mean of the colors
+    total = _load("example_img_stack", cache_dir).sum(axis=-1, dtype=np.uint16)
+    if dtype.kind == "f":
+        gray: np.ndarray = np.divide(total, 3, dtype=dtype)
+    else:
+        gray = ((total + 1) // 3).astype(dtype)
+    gray %= 255
+    gray.flags.writeable = False
+    return gray
+
+
+def gray_image_stack(
+    dtype: Any = np.float64, cache_dir: PathLike | None = None
+) -> np.ndarray:
     """
     Get the example image stack in grayscale.
 
+    Parameters
+    ----------
+    dtype : dtype, default float64
+        The dtype of the images. Integer dtypes round to the nearest integer.
+    cache_dir : str or path-like, optional
+        See `color_image_stack`.
+
     Returns
     -------
     img : np.ndarray
-        With shape (5, 512, 512, 3)
+        With shape (5, 512, 512). It is read only and the same array is returned
+        by every call with the same arguments.
 
     See Also
     --------
@@ -28,17 +81,25 @@ def gray_image_stack() -> np.ndarray:
     -----
     See color_image_stack for documentation on how the images were generated.
     """
-    return color_image_stack().mean(axis=-1) % 255
+    return _gray(np.dtype(dtype), _cache_key(cache_dir))
 
 
-def color_image_stack() -> np.ndarray:
+def color_image_stack(cache_dir: PathLike | None = None) -> np.ndarray:
     """
     Get the example image as a color image.
 
+    Parameters
+    ----------
+    cache_dir : str or path-like, optional
+        A directory to keep an uncompressed copy of the images in. The copy is
+        memory mapped, so loading the images is almost free even in a new
+        process. By default they are decompressed once per process.
+
     Returns
     -------
     img : np.ndarray
-        With shape (5, 512, 512, 3)
+        With shape (5, 512, 512, 3). It is read only and the same array is
+        returned by every call with the same *cache_dir*.
 
     See Also
     --------
@@ -58,16 +119,22 @@ def color_image_stack() -> np.ndarray:
     np.savez_compressed("example_img_stack.npz", shapes)
     ```
     """
-    return np.load(Path(__file__).parent / "example_img_stack.npz")["arr_0"]
+    return _load("example_img_stack", _cache_key(cache_dir))
 
 
-def example_mask_stack() -> np.ndarray:
+def example_mask_stack(cache_dir: PathLike | None = None) -> np.ndarray:
     """
     Get the premade example mask stack.
 
+    Parameters
+    ----------
+    cache_dir : str or path-like, optional
+        See `color_image_stack`.
+
     Returns
     -------
     img : np.ndarray
-        With shape (5, 512, 512)
+        With shape (5, 512, 512). It is read only and the same array is
+        returned by every call with the same *cache_dir*.
     """
-    return np.load(Path(__file__).parent / "mask.npz")["arr_0"]
+    return _load("mask", _cache_key(cache_dir))
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from matplotlib.backend_bases import CloseEvent
+from mpl_image_segmenter import ImageSegmenter, _autosave
+
+SQUARE = [(5, 5), (5, 20), (20, 20), (20, 5)]
+
+
+def test_autosave(tmp_path):
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), autosave=tmp_path)
+    seg._onselect(SQUARE)
+    seg.image_index = 2
+    seg.erasing = True
+    seg._onselect(SQUARE)
+    seg.wait_for_autosave()
+    # only the images that were drawn on are saved
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "mask_00000.npy",
+        "mask_00002.npy",
+        "strokes_000000.npz",
+        "strokes_000001.npz",
+    ]
+    # each save only writes the strokes that changed
+    with np.load(tmp_path / "strokes_000001.npz") as saved:
+        assert saved["start"] == 1
+        np.testing.assert_array_equal(saved["vertices"], SQUARE)
+    np.testing.assert_array_equal(np.load(tmp_path / "mask_00000.npy"), seg.mask[0])
+
+    recovered = ImageSegmenter(np.zeros([3, 32, 32]), autosave=tmp_path)
+    np.testing.assert_array_equal(recovered.mask, seg.mask)
+    paths = recovered.get_paths()
+    assert len(paths["adding"]) == 1
+    np.testing.assert_array_equal(paths["erasing"][0].vertices, SQUARE)
+    assert not recovered.can_undo
+
+    with pytest.raises(ValueError, match="already holds a saved mask"):
+        ImageSegmenter(np.zeros([3, 32, 32]), mask=seg.mask, autosave=tmp_path)
+    with pytest.raises(ValueError, match="does not fit"):
+        ImageSegmenter(np.zeros([2, 16, 16]), autosave=tmp_path)
+
+
+def test_autosave_interval(tmp_path):
+    seg = ImageSegmenter(np.zeros([32, 32]), autosave=tmp_path, autosave_interval=60)
+    seg._onselect(SQUARE)
+    seg.undo()
+    assert not any(tmp_path.iterdir())
+    # the timer would do this
+    seg._autosave()
+    seg.wait_for_autosave()
+    assert not np.load(tmp_path / "mask_00000.npy").any()
+
+
+def test_autosave_on_close(tmp_path):
+    seg = ImageSegmenter(np.zeros([32, 32]), autosave=tmp_path, autosave_interval=60)
+    seg._onselect(SQUARE)
+    # what closing the window does
+    seg.fig.canvas.callbacks.process(
+        "close_event", CloseEvent("close_event", seg.fig.canvas)
+    )
+    # without saving anything new
+    seg._autosaver.wait()
+    assert np.load(tmp_path / "mask_00000.npy").any()
+
+
+def test_autosave_undo_and_merge(tmp_path, monkeypatch):
+    monkeypatch.setattr(_autosave, "_MAX_STROKE_FILES", 3)
+    seg = ImageSegmenter(np.zeros([32, 32]), autosave=tmp_path)
+    for offset in range(4):
+        seg._onselect([(x + offset, y) for x, y in SQUARE])
+    seg.undo()
+    seg.undo()
+    seg._onselect(SQUARE)
+    seg.wait_for_autosave()
+    assert len(list(tmp_path.glob("strokes_*.npz"))) <= 3
+    recovered = ImageSegmenter(np.zeros([32, 32]), autosave=tmp_path)
+    np.testing.assert_array_equal(recovered.mask, seg.mask)
+    saved = [p.vertices for p in recovered.get_paths()["adding"]]
+    expected = [p.vertices for p in seg.get_paths()["adding"]]
+    assert len(saved) == len(expected) == 3
+    for a, b in zip(saved, expected):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_autosave_retries_failed_writes(tmp_path, monkeypatch):
+    seg = ImageSegmenter(np.zeros([2, 32, 32]), autosave=tmp_path)
+    atomic_write = _autosave._atomic_write
+
+    def fail_once(path, write):
+        monkeypatch.setattr(_autosave, "_atomic_write", atomic_write)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(_autosave, "_atomic_write", fail_once)
+    seg._onselect(SQUARE)
+    with pytest.raises(OSError, match="disk full"):
+        seg.wait_for_autosave()
+    seg.image_index = 1
+    seg._onselect(SQUARE)
+    seg.wait_for_autosave()
+    recovered = ImageSegmenter(np.zeros([2, 32, 32]), autosave=tmp_path)
+    np.testing.assert_array_equal(recovered.mask, seg.mask)
+    assert len(recovered.get_paths()["adding"]) == 2
@@ -0,0 +1,57 @@
+import gc
+import weakref
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from mpl_image_segmenter import ImageSegmenter
+
+
+def test_prefetch():
+    imgs = np.random.default_rng(0).random([6, 32, 32])
+    seg = ImageSegmenter(imgs, cache_size=3, prefetch=1)
+    assert seg.frame_cache_info().maxsize == 3
+    seg.image_index = 1
+    seg.image_index = 2
+    info = seg.frame_cache_info()
+    assert info.hits == 2
+    assert info.misses == 0
+    np.testing.assert_array_equal(seg._displayed.get_array(), imgs[2])
+
+    with pytest.raises(ValueError, match="cache_size must be at least 3"):
+        ImageSegmenter(imgs, cache_size=2, prefetch=1)
+    assert ImageSegmenter(imgs).frame_cache_info() is None
+
+
+def test_cached_overlay_tracks_strokes():
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), cache_size=3)
+    seg.image_index = 1
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    seg.image_index = 0
+    seg.image_index = 1
+    assert seg.frame_cache_info().hits == 1
+    assert seg._overlay[10, 10].any()
+
+    # replacing the mask means the cached overlays are recomputed
+    seg.mask = np.zeros([3, 32, 32])
+    seg.image_index = 1
+    assert not seg._overlay.any()
+
+
+def test_in_place_mask_edit():
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), cache_size=3, prefetch=1)
+    seg.image_index = 1
+    seg.image_index = 0
+    seg.mask[1] = 1
+    seg.image_index = 1
+    assert (seg._overlay[..., -1] > 0).all()
+
+
+def test_cache_does_not_leak():
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), cache_size=3, prefetch=1)
+    seg.image_index = 1
+    ref = weakref.ref(seg)
+    del seg
+    plt.close("all")
+    gc.collect()
+    assert ref() is None
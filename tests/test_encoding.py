@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from mpl_image_segmenter import ImageSegmenter, SparseMask, rle_decode, rle_encode
+
+
+def test_rle_encode():
+    mask = np.array([[0, 1, 1], [0, 0, 1]])
+    # COCO runs down the columns
+    assert rle_encode(mask) == {"size": [2, 3], "counts": [2, 1, 1, 2]}
+    assert rle_encode(mask, order="C") == {"size": [2, 3], "counts": [1, 2, 2, 1]}
+    assert rle_encode(np.zeros([2, 3]))["counts"] == [6]
+    assert rle_encode(np.ones([2, 3]))["counts"] == [0, 6]
+    with pytest.raises(ValueError, match="order"):
+        rle_encode(mask, order="A")
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_rle_round_trip(order):
+    mask = np.random.default_rng(0).random([37, 23]) > 0.7
+    np.testing.assert_array_equal(rle_decode(rle_encode(mask, order), order), mask)
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_sparse_mask(order):
+    rng = np.random.default_rng(0)
+    mask = rng.integers(0, 4, [3, 20, 30]) * (rng.random([3, 20, 30]) > 0.8)
+    sparse = SparseMask.from_dense(mask)
+    assert sparse.classes == [1, 2, 3]
+    np.testing.assert_array_equal(sparse.to_dense(), mask)
+    assert sparse.to_dense().dtype == np.uint8
+
+    rles = sparse.to_rle(order)
+    assert len(rles[2]) == 3
+    np.testing.assert_array_equal(rle_decode(rles[2][1], order), mask[1] == 2)
+    decoded = SparseMask.from_rle(rles, order)
+    np.testing.assert_array_equal(decoded.to_dense(), mask)
+
+    single = SparseMask.from_dense(mask[0])
+    assert single.to_rle(order)[1] == rle_encode(mask[0] == 1, order)
+    empty = SparseMask.from_rle({}, shape=(20, 30))
+    assert not empty.to_dense().any()
+
+
+def test_sparse_mask_argument():
+    mask = np.zeros([2, 16, 16], dtype=int)
+    mask[1, 3:8, 4:9] = 2
+    seg = ImageSegmenter(
+        np.zeros([2, 16, 16]), classes=2, mask=SparseMask.from_dense(mask)
+    )
+    assert seg.mask.dtype == np.uint8
+    np.testing.assert_array_equal(seg.mask, mask)
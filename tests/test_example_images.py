@@ -0,0 +1,39 @@
+import numpy as np
+from mpl_image_segmenter import ImageSegmenter
+from mpl_image_segmenter.example_images import (
+    color_image_stack,
+    example_mask_stack,
+    gray_image_stack,
+)
+
+
+def test_loaders_are_cached():
+    color = color_image_stack()
+    assert color is color_image_stack()
+    assert not color.flags.writeable
+    np.testing.assert_allclose(gray_image_stack(), color.mean(axis=-1) % 255)
+    gray = gray_image_stack(np.float32)
+    assert gray.dtype == np.float32
+    assert gray is gray_image_stack(np.float32)
+    assert gray_image_stack(np.uint8).dtype == np.uint8
+
+
+def test_npy_cache(tmp_path):
+    mask = example_mask_stack(cache_dir=tmp_path)
+    assert isinstance(mask, np.memmap)
+    assert not mask.flags.writeable
+    np.testing.assert_array_equal(mask, example_mask_stack())
+    assert (tmp_path / "mask.npy").exists()
+    np.testing.assert_array_equal(
+        gray_image_stack(cache_dir=tmp_path), gray_image_stack()
+    )
+
+
+def test_segment_example_mask():
+    mask = example_mask_stack()
+    seg = ImageSegmenter(gray_image_stack(), classes=3, mask=mask)
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    assert (seg.mask[0, 6:20, 6:20] == 1).all()
+    # the shared example mask is left alone
+    np.testing.assert_array_equal(mask, example_mask_stack())
+    assert not np.shares_memory(seg.mask, mask)
@@ -0,0 +1,64 @@
+import numpy as np
+from mpl_image_segmenter import ImageSegmenter
+
+SQUARE = [(5, 5), (5, 20), (20, 20), (20, 5)]
+TRIANGLE = [(10, 10), (10, 30), (30, 10)]
+
+
+def test_undo_redo():
+    seg = ImageSegmenter(np.zeros([2, 32, 32]), classes=2)
+    assert not seg.undo()
+    seg._onselect(SQUARE)
+    first = seg.mask[0].copy()
+    seg.current_class = 2
+    seg._onselect(TRIANGLE)
+    second = seg.mask[0].copy()
+    seg.image_index = 1
+    seg.erasing = True
+    seg._onselect(SQUARE)
+
+    assert seg.undo()
+    np.testing.assert_array_equal(seg.mask[0], second)
+    assert seg.undo()
+    np.testing.assert_array_equal(seg.mask[0], first)
+    assert (seg._overlay[..., -1] > 0).sum() == 0
+    assert seg.undo()
+    assert not seg.mask.any()
+    assert not seg.can_undo
+
+    assert seg.redo()
+    assert seg.redo()
+    np.testing.assert_array_equal(seg.mask[0], second)
+    # drawing discards the strokes that were undone
+    seg._onselect(SQUARE)
+    assert not seg.redo()
+
+
+def test_get_paths():
+    seg = ImageSegmenter(np.zeros([2, 32, 32]))
+    seg._onselect(SQUARE)
+    seg.image_index = 1
+    seg.erasing = True
+    seg._onselect(TRIANGLE)
+    paths = seg.get_paths()
+    assert len(paths["adding"]) == 1
+    np.testing.assert_array_equal(paths["erasing"][0].vertices, TRIANGLE)
+    assert seg.get_paths(image_index=0)["erasing"] == []
+    seg.undo()
+    assert seg.get_paths()["erasing"] == []
+
+
+def test_undo_budget():
+    # each stroke keeps a 16x16 uint8 patch
+    seg = ImageSegmenter(np.zeros([32, 32]), undo_budget=600)
+    for _ in range(4):
+        seg._onselect(SQUARE)
+    assert seg._history.nbytes - seg._history._vertices.nbytes <= 600
+    assert seg.undo()
+    assert seg.undo()
+    assert not seg.undo()
+    assert len(seg.get_paths()["adding"]) == 2
+
+    # replacing the mask means nothing can be undone
+    seg.mask = np.zeros([32, 32])
+    assert not seg.can_undo
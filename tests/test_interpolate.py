@@ -0,0 +1,58 @@
+import numpy as np
+from mpl_image_segmenter import ImageSegmenter
+from mpl_image_segmenter._interpolate import distance_to, interpolate_labels
+
+
+def test_distance_to():
+    rng = np.random.default_rng(0)
+    seeds = rng.random([2, 30, 41]) > 0.99
+    rows, cols = np.indices(seeds.shape[1:])
+    for image, distance in zip(seeds, distance_to(seeds)):
+        y, x = np.nonzero(image)
+        exact = np.hypot(rows[..., None] - y, cols[..., None] - x).min(axis=-1)
+        np.testing.assert_allclose(distance, exact, atol=1e-5)
+    assert np.isinf(distance_to(np.zeros([1, 4, 4], dtype=bool))).all()
+
+
+def test_interpolate_labels():
+    first = np.zeros([40, 40], dtype=np.uint8)
+    first[10:20, 10:20] = 1
+    last = np.zeros_like(first)
+    last[10:30, 10:30] = 1
+    last[0:4, 0:4] = 2
+    labels = interpolate_labels(first, last, 3)
+    sizes = (labels == 1).sum(axis=(1, 2))
+    assert (np.diff(sizes) > 0).all()
+    assert 100 < sizes[0] and sizes[-1] < 400
+    # class 2 is only in the last image, so is too far away to appear in between
+    assert not (labels == 2).any()
+
+
+def test_segmenter_propagate_and_interpolate():
+    seg = ImageSegmenter(np.zeros([6, 32, 32]), classes=2)
+    seg._onselect([(5, 5), (5, 15), (15, 15), (15, 5)])
+    seg.propagate_labels(0, 1, 3)
+    np.testing.assert_array_equal(seg.mask[1], seg.mask[0])
+    np.testing.assert_array_equal(seg.mask[2], seg.mask[0])
+    assert not seg.mask[3].any()
+    assert not seg.can_undo
+
+    seg.image_index = 5
+    seg._onselect([(5, 5), (5, 25), (25, 25), (25, 5)])
+    seg.image_index = 3
+    seg.interpolate_labels(2, 5)
+    sizes = seg.mask.sum(axis=(1, 2)).tolist()
+    assert sizes[2] < sizes[3] < sizes[4] < sizes[5]
+    # the overlay of the image on display is updated
+    assert (seg._overlay[..., -1] > 0).sum() == sizes[3]
+
+
+def test_interpolate_nothing_between():
+    seg = ImageSegmenter(np.zeros([3, 32, 32]))
+    seg._onselect([(5, 5), (5, 15), (15, 15), (15, 5)])
+    before = seg.mask.copy()
+    seg.interpolate_labels(0, 0)
+    seg.interpolate_labels(1, 0)
+    np.testing.assert_array_equal(seg.mask, before)
+    # nothing was replaced so the stroke can still be undone
+    assert seg.can_undo
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from mpl_image_segmenter import ImageSegmenter
+
+
+class LazyStack:
+    """Only exposes shape, dtype, and indexing and records what is read."""
+
+    def __init__(self, arr):
+        self._arr = arr
+        self.shape = arr.shape
+        self.dtype = arr.dtype
+        self.reads = []
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return self._arr[key]
+
+    def __setitem__(self, key, val):
+        self._arr[key] = val
+
+    def __array__(self, dtype=None, copy=None):
+        raise AssertionError("The whole stack should never be loaded")
+
+
+def test_lazy_imgs():
+    imgs = LazyStack(np.zeros([4, 32, 32]))
+    seg = ImageSegmenter(imgs)
+    seg.image_index = 2
+    assert imgs.reads == [0, 2]
+    assert seg.mask.shape == (4, 32, 32)
+
+
+def test_lazy_single_image():
+    img = LazyStack(np.zeros([32, 32, 3]))
+    mask = np.zeros([32, 32], dtype=np.uint8)
+    seg = ImageSegmenter(img, color_image=True, mask=LazyStack(mask))
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    assert mask.sum() == 210
+
+
+def test_memmap(tmp_path):
+    np.lib.format.open_memmap(
+        tmp_path / "imgs.npy", mode="w+", dtype=np.uint8, shape=(3, 32, 32)
+    )
+    mask = np.lib.format.open_memmap(
+        tmp_path / "mask.npy", mode="w+", dtype=np.uint8, shape=(3, 32, 32)
+    )
+    seg = ImageSegmenter(np.load(tmp_path / "imgs.npy", mmap_mode="r"), mask=mask)
+    assert isinstance(seg._imgs, np.memmap)
+    seg.image_index = 1
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    mask.flush()
+    assert np.load(tmp_path / "mask.npy")[1].sum() == 210
+
+
+def test_lazy_mask_dtype():
+    mask = LazyStack(np.zeros([2, 32, 32]))
+    with pytest.raises(TypeError, match="must have dtype uint8"):
+        ImageSegmenter(np.zeros([2, 32, 32]), mask=mask)
@@ -1,4 +1,6 @@
 import re
+import subprocess
+import sys
 
 import numpy as np
 import pytest
@@ -75,3 +77,140 @@ def test_current_class():
         ),
     ):
         seg.current_class = 5
+
+
+def test_pix():
+    seg = ImageSegmenter(np.zeros([3, 4]))
+    assert seg.pix.shape == (12, 2)
+    np.testing.assert_array_equal(seg.pix[:5], [[0, 0], [1, 0], [2, 0], [3, 0], [0, 1]])
+
+
+def test_overlay_from_mask():
+    mask = np.zeros([2, 16, 16])
+    mask[1, :4] = 1
+    mask[1, 4:8] = 12
+    seg = ImageSegmenter(np.zeros([2, 16, 16]), classes=12, mask=mask)
+    assert not seg._overlay.any()
+    seg.image_index = 1
+    colors = np.round(seg.mask_colors * 255)
+    np.testing.assert_array_equal(
+        seg._overlay[:4], np.broadcast_to(colors[0], (4, 16, 4))
+    )
+    np.testing.assert_array_equal(
+        seg._overlay[4:8], np.broadcast_to(colors[11], (4, 16, 4))
+    )
+    assert not seg._overlay[8:].any()
+
+
+def test_mask_dtype():
+    img = np.zeros([2, 16, 16])
+    assert ImageSegmenter(img).mask.dtype == np.uint8
+    assert ImageSegmenter(img, classes=300).mask.dtype == np.uint16
+    assert ImageSegmenter(img, mask_dtype="int32").mask.dtype == np.int32
+    assert ImageSegmenter(img)._overlay.dtype == np.uint8
+    with pytest.raises(ValueError, match="cannot hold"):
+        ImageSegmenter(img, classes=300, mask_dtype=np.uint8)
+
+    # masks of the right type are used as is, others are cast
+    mask = np.zeros([2, 16, 16], dtype=np.uint8)
+    seg = ImageSegmenter(img, classes=3, mask=mask)
+    assert seg.mask is mask
+    seg.mask = np.full([2, 16, 16], 2.0)
+    assert seg.mask.dtype == np.uint8
+    assert (seg.mask == 2).all()
+    with pytest.raises(ValueError, match="Mask values must be integers"):
+        seg.mask = np.full([2, 16, 16], 0.5)
+
+
+def test_blit_stroke():
+    img = np.random.default_rng(0).random([128, 128])
+    seg = ImageSegmenter(img)
+    # the lasso only has a background to blit onto after the first draw
+    seg.fig.canvas.draw()
+    seg._onselect([(25, 25), (25, 100), (100, 100), (100, 25)])
+    blitted = np.array(seg.fig.canvas.buffer_rgba())
+    assert seg._mask_im.get_array()[50, 50, -1] > 0
+
+    seg.fig.canvas.draw()
+    np.testing.assert_array_equal(blitted, seg.fig.canvas.buffer_rgba())
+
+
+def test_labels_overlay():
+    img = np.random.default_rng(0).random([2, 128, 128])
+    rgba = ImageSegmenter(img, classes=2)
+    seg = ImageSegmenter(img, classes=2, overlay="labels")
+    # the mask of the current image is shown directly
+    assert seg._overlay.base is seg._mask
+    for s in (rgba, seg):
+        s.fig.canvas.draw()
+        s._onselect([(25, 25), (25, 100), (100, 100), (100, 25)])
+        s.fig.canvas.draw()
+    np.testing.assert_array_equal(seg._mask_im.get_array(), seg.mask[0])
+    # nearest neighbour interpolation of the labels looks the same as the colors
+    np.testing.assert_allclose(
+        np.asarray(seg.fig.canvas.buffer_rgba(), dtype=float),
+        np.asarray(rgba.fig.canvas.buffer_rgba(), dtype=float),
+        atol=2,
+    )
+
+    seg.mask_alpha = 0.5
+    assert (seg.mask_colors[:, -1] == 0.5).all()
+    assert seg._mask_im.get_cmap()(1)[-1] == 0.5
+    seg.mask_colors = "red"
+    assert seg._mask_im.get_cmap()(2) == (1, 0, 0, 0.5)
+    # extra colors are ignored
+    seg.mask_colors = ["red", "blue", "green"]
+    assert seg._mask_im.get_cmap()(2) == (0, 0, 1, 0.5)
+
+
+def test_mask_colors():
+    seg = ImageSegmenter(np.zeros([16, 16]), classes=2, mask=np.ones([16, 16]))
+    seg.mask_colors = ["red", "blue"]
+    np.testing.assert_array_equal(seg._overlay[0, 0], [255, 0, 0, 191])
+    seg.mask_alpha = 1
+    assert seg._overlay[0, 0, -1] == 255
+    # edits in place are used once the overlay is redrawn
+    seg.mask_colors[0] = [0, 1, 0, 1]
+    seg._onselect([(2, 2), (2, 8), (8, 8), (8, 2)])
+    np.testing.assert_array_equal(seg._overlay[0, 0], [0, 255, 0, 255])
+    with pytest.raises(ValueError, match="Expected 1 or at least 3 mask colors"):
+        ImageSegmenter(np.zeros([16, 16]), classes=3, mask_colors=["red", "blue"])
+
+
+def test_import_is_lazy():
+    # headless workers only need the mask utilities, not pyplot or the widgets
+    code = (
+        "import sys, mpl_image_segmenter; "
+        "print([m for m in ('matplotlib.pyplot', 'matplotlib.widgets', 'mpl_pan_zoom')"
+        " if m in sys.modules])"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "[]"
+
+
+def test_class_counts():
+    mask = np.zeros([3, 32, 32], dtype=np.uint8)
+    mask[0, :4] = 2
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), classes=2, mask=mask)
+
+    def expected():
+        return np.stack([np.bincount(m.ravel(), minlength=3) for m in seg._mask])
+
+    np.testing.assert_array_equal(seg.class_counts[0], [896, 0, 128])
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    seg.erasing = True
+    seg._onselect([(0, 0), (0, 10), (10, 10), (10, 0)])
+    np.testing.assert_array_equal(seg.class_counts, expected())
+    seg.undo()
+    seg.undo()
+    np.testing.assert_array_equal(seg.class_counts, expected())
+    seg.redo()
+    seg.propagate_labels(0, 1, 3)
+    np.testing.assert_array_equal(seg.class_counts, expected())
+    assert not seg.class_counts.flags.writeable
+
+    # edits in place through the mask are counted the next time
+    seg.mask[2] = 1
+    np.testing.assert_array_equal(seg.class_counts[2], [0, 1024, 0])
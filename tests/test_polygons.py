@@ -0,0 +1,60 @@
+import numpy as np
+from matplotlib.path import Path
+from mpl_image_segmenter import ImageSegmenter, mask_to_polygons
+
+
+def _rasterize(polygons, shape):
+    """Fill the outer rings and cut out the holes, at the pixel centers."""
+    rows, cols = np.indices(shape)
+    centers = np.c_[cols.ravel(), rows.ravel()]
+    filled = np.zeros(len(centers), dtype=int)
+    for ring, hole in zip(
+        np.split(polygons.vertices, polygons.stops[:-1]), polygons.holes
+    ):
+        filled += Path(ring).contains_points(centers) * (-1 if hole else 1)
+    return filled.reshape(shape) > 0
+
+
+def test_mask_to_polygons():
+    rng = np.random.default_rng(0)
+    mask = (rng.random((2, 30, 40)) < 0.4) * rng.integers(1, 4, (2, 30, 40))
+    polygons = mask_to_polygons(mask, max_workers=1)
+    assert len(polygons) == 2
+    for image, image_polygons in zip(mask, polygons):
+        assert sorted(image_polygons) == [1, 2, 3]
+        for value, p in image_polygons.items():
+            np.testing.assert_array_equal(_rasterize(p, image.shape), image == value)
+            # the outer rings go around one way and the holes the other
+            x, y = np.moveaxis(np.split(p.vertices, p.stops[:-1])[0], -1, 0)
+            assert (x * np.roll(y, -1) - np.roll(x, -1) * y).sum() > 0
+            assert p.vertices.dtype == np.float32
+
+    simplified = mask_to_polygons(mask[0], tolerance=0.75)
+    for value, p in simplified.items():
+        assert len(p.vertices) < len(polygons[0][value].vertices)
+        np.testing.assert_array_equal(p.holes, polygons[0][value].holes)
+    assert mask_to_polygons(np.zeros((4, 4))) == {}
+
+
+def test_polygon_holes():
+    mask = np.zeros((8, 8), dtype=np.uint8)
+    mask[1:7, 1:7] = 1
+    mask[3:5, 3:5] = 2
+    # diagonal pixels are separate regions
+    mask[0, 0] = mask[1, 1] = 3
+    polygons = mask_to_polygons(mask)
+    np.testing.assert_array_equal(polygons[1].holes, [False, True])
+    np.testing.assert_array_equal(
+        polygons[2].vertices, [[2.5, 2.5], [4.5, 2.5], [4.5, 4.5], [2.5, 4.5]]
+    )
+    assert len(polygons[3].stops) == 2
+
+
+def test_segmenter_polygons():
+    seg = ImageSegmenter(np.zeros([2, 64, 64]), mask_tile_size=16)
+    seg._onselect([(5, 5), (5, 40), (40, 40), (40, 5)])
+    seg.erasing = True
+    seg._onselect([(10, 10), (10, 20), (20, 20), (20, 10)])
+    polygons = seg.to_polygons(max_workers=1)
+    np.testing.assert_array_equal(polygons[0][1].holes, [False, True])
+    assert polygons[1] == {}
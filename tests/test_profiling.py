@@ -0,0 +1,33 @@
+import numpy as np
+from mpl_image_segmenter import ImageSegmenter
+
+
+def test_profiling():
+    seg = ImageSegmenter(np.zeros([2, 64, 64]))
+    assert seg.profiler is None
+    profiler = seg.enable_profiling()
+    assert seg.enable_profiling() is profiler
+
+    events = []
+    cid = profiler.connect(lambda name, seconds, info: events.append((name, info)))
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    assert ("rasterize", {"window": (16, 16), "pixels": 210}) in events
+    profiler.disconnect(cid)
+
+    seg.image_index = 1
+    seg.fig.canvas.draw()
+    stats = profiler.stats()
+    assert {
+        "rasterize",
+        "update_overlay",
+        "refresh_overlay",
+        "set_data",
+        "draw",
+    } <= set(stats)
+    assert stats["set_data"].count == 2
+    assert stats["rasterize"].p50 <= stats["rasterize"].p95 <= stats["rasterize"].max
+
+    seg.disable_profiling()
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    assert seg.profiler is None
+    assert profiler.stats()["rasterize"].count == 1
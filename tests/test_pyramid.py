@@ -0,0 +1,65 @@
+import numpy as np
+from mpl_image_segmenter import ImageSegmenter
+from mpl_image_segmenter._pyramid import Pyramid, halve
+
+
+def test_halve():
+    img = np.arange(15, dtype=np.uint8).reshape(3, 5)
+    half = halve(img)
+    assert half.shape == (2, 3)
+    assert half.dtype == np.uint8
+    assert half[0, 0] == np.rint(img[:2, :2].mean())
+    # the odd row and column are repeated
+    assert half[1, 2] == img[2, 4]
+    assert halve(np.zeros([4, 6, 3])).shape == (2, 3, 3)
+    assert Pyramid(np.zeros([64, 64]), 3)[2].shape == (16, 16)
+
+
+def test_pyramid_display():
+    imgs = np.random.default_rng(0).random([2, 1024, 1024])
+    seg = ImageSegmenter(imgs, pyramid_levels=4, view_margin=0, figsize=(2, 2))
+    seg.fig.canvas.draw()
+    # a 1024 pixel image shown about 155 pixels wide
+    shown = seg._displayed.get_array()
+    assert shown.shape == (256, 256)
+    np.testing.assert_allclose(
+        seg._displayed.get_extent(), (-0.5, 1023.5, 1023.5, -0.5)
+    )
+    np.testing.assert_allclose(shown[0, 0], imgs[0, :4, :4].mean())
+
+    # zooming in shows only the visible part at full resolution
+    seg.ax.set_xlim(99.5, 199.5)
+    seg.ax.set_ylim(149.5, 49.5)
+    np.testing.assert_array_equal(seg._displayed.get_array(), imgs[0, 50:150, 100:200])
+    assert seg._mask_im.get_array().shape == (100, 100, 4)
+
+    # strokes still go into the full resolution mask
+    stroke = [(110, 60), (110, 80), (130, 80), (130, 60)]
+    seg._onselect(stroke)
+    full = ImageSegmenter(imgs)
+    full._onselect(stroke)
+    np.testing.assert_array_equal(seg.mask, full.mask)
+    assert seg._mask_im.get_array()[20, 20, -1] > 0
+
+    seg.image_index = 1
+    np.testing.assert_array_equal(seg._displayed.get_array(), imgs[1, 50:150, 100:200])
+    assert not seg._mask_im.get_array()[..., -1].any()
+
+
+def test_crop_to_view():
+    img = np.random.default_rng(0).random([512, 512])
+    seg = ImageSegmenter(img, crop_to_view=True, figsize=(2, 2))
+    np.testing.assert_array_equal(seg._displayed.get_array(), img)
+
+    seg.ax.set_xlim(99.5, 199.5)
+    seg.ax.set_ylim(149.5, 49.5)
+    # the view plus half of it again on every side
+    np.testing.assert_array_equal(seg._displayed.get_array(), img[0:200, 50:250])
+    np.testing.assert_allclose(seg._displayed.get_extent(), (49.5, 249.5, 199.5, -0.5))
+
+    # panning within the margin keeps the same arrays
+    shown = seg._displayed.get_array()
+    seg.ax.set_xlim(119.5, 219.5)
+    assert seg._displayed.get_array() is shown
+    seg.ax.set_xlim(299.5, 399.5)
+    np.testing.assert_array_equal(seg._displayed.get_array(), img[0:200, 250:450])
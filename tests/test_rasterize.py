@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from matplotlib.path import Path
+from mpl_image_segmenter import ImageSegmenter, rasterize_stack
+from mpl_image_segmenter._rasterize import rasterize
+
+
+def _full(shape, window, inside):
+    out = np.zeros(shape, dtype=bool)
+    out[window] = inside
+    return out
+
+
+@pytest.mark.parametrize("method", ["matplotlib", "scanline"])
+def test_matches_contains_points(method):
+    rng = np.random.default_rng(0)
+    shape = (60, 80)
+    yv, xv = np.mgrid[: shape[0], : shape[1]]
+    pix = np.column_stack((xv.ravel(), yv.ravel()))
+    for i in range(400):
+        verts = rng.uniform(-20, 100, (rng.integers(2, 40), 2))
+        if i % 2:
+            # pixel centers that lie exactly on an edge are the hard cases
+            denominator = (1, 3, 7, 10)[i % 8 // 2]
+            verts = np.round(verts * denominator) / denominator
+        path = Path(verts)
+        expected = path.contains_points(pix, radius=0).reshape(shape)
+        np.testing.assert_array_equal(
+            _full(shape, *rasterize(path, shape, method)), expected
+        )
+
+
+def test_outside_image():
+    path = Path([(-10, -10), (-5, -10), (-5, -5)])
+    _, inside = rasterize(path, (10, 10), "scanline")
+    assert inside.shape == (0, 0)
+
+
+def test_segmenter_rasterizer():
+    seg = ImageSegmenter(np.zeros([128, 128]), rasterizer="scanline")
+    seg._onselect([(25, 25), (25, 100), (100, 100), (100, 25)])
+    assert seg.mask.sum() == 5550
+    with pytest.raises(ValueError, match="is not a valid rasterizer"):
+        seg.rasterizer = "agg"
+
+
+def test_rasterize_stack():
+    square = [(25, 25), (25, 100), (100, 100), (100, 25)]
+    small = [(40, 40), (40, 60), (60, 60), (60, 40)]
+    strokes = [[(square, 1), (Path(small), 2)], [], [(square, 3), (small, 0)]]
+
+    seg = ImageSegmenter(np.zeros([3, 128, 128]), classes=3)
+    for i, image in enumerate(strokes):
+        seg.image_index = i
+        for verts, cls in image:
+            seg.erasing = cls == 0
+            if cls:
+                seg.current_class = cls
+            seg._onselect(verts.vertices if isinstance(verts, Path) else verts)
+
+    masks = rasterize_stack(strokes, (128, 128), max_workers=2)
+    assert masks.dtype == np.uint8
+    np.testing.assert_array_equal(masks, seg.mask)
+    np.testing.assert_array_equal(
+        rasterize_stack(strokes, (128, 128), rasterizer="matplotlib", max_workers=1),
+        masks,
+    )
+
+    doubled = rasterize_stack(strokes, (128, 128), scale=2, max_workers=1)
+    assert doubled.shape == (3, 256, 256)
+    assert abs(int((doubled[0] == 1).sum()) - 4 * int((masks[0] == 1).sum())) < 1200
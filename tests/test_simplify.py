@@ -0,0 +1,43 @@
+import numpy as np
+from matplotlib.path import Path
+from mpl_image_segmenter import ImageSegmenter
+from mpl_image_segmenter._simplify import simplify
+
+
+def _distance_to_polyline(points, vertices):
+    a = vertices[:-1][None]
+    ab = (vertices[1:] - vertices[:-1])[None]
+    ap = points[:, None] - a
+    t = np.clip((ap * ab).sum(-1) / np.maximum((ab * ab).sum(-1), 1e-12), 0, 1)
+    return np.hypot(*np.moveaxis(ap - t[..., None] * ab, -1, 0)).min(axis=1)
+
+
+def test_simplify():
+    # a slowly and shakily drawn circle
+    rng = np.random.default_rng(0)
+    theta = np.linspace(0, 2 * np.pi, 5000)
+    verts = np.c_[50 + 30 * np.cos(theta), 50 + 30 * np.sin(theta)]
+    verts += rng.normal(scale=0.1, size=verts.shape)
+    simple = simplify(verts, 0.5)
+    assert len(simple) < 100
+    np.testing.assert_array_equal(simple[[0, -1]], verts[[0, -1]])
+    assert _distance_to_polyline(verts, simple).max() <= 0.5
+
+    np.testing.assert_array_equal(simplify(verts, 0), verts)
+    np.testing.assert_array_equal(simplify(verts[:2], 1), verts[:2])
+
+
+def test_simplified_selection():
+    theta = np.linspace(0, 2 * np.pi, 5000)
+    verts = np.c_[64 + 40 * np.cos(theta), 64 + 40 * np.sin(theta)]
+    exact = ImageSegmenter(np.zeros([128, 128]))
+    exact._onselect(verts)
+    seg = ImageSegmenter(np.zeros([128, 128]), simplify_tolerance=0.5)
+    seg._onselect(verts)
+    assert len(seg.get_paths()["adding"][0].vertices) < 100
+
+    # only pixels within the tolerance of the lasso can differ
+    changed = np.argwhere(seg.mask[0] != exact.mask[0])[:, ::-1]
+    assert len(changed) < 0.01 * exact.mask.sum()
+    path = Path(verts)
+    assert (_distance_to_polyline(changed, path.vertices) <= 0.5).all()
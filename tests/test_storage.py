@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from mpl_image_segmenter import ImageSegmenter
+
+
+def test_mask_file(tmp_path):
+    path = tmp_path / "mask.npy"
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), mask_file=path)
+    seg.image_index = 2
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    on_disk = np.load(path)
+    assert on_disk.shape == (3, 32, 32)
+    assert on_disk[2].sum() == 210
+
+    # reopening resumes from the file
+    seg = ImageSegmenter(np.zeros([3, 32, 32]), mask_file=path)
+    assert seg.mask[2].sum() == 210
+    seg.mask = np.ones([3, 32, 32])
+    assert np.load(path).sum() == 3 * 32 * 32
+
+    with pytest.raises(ValueError, match="but a uint8 mask of shape"):
+        ImageSegmenter(np.zeros([2, 32, 32]), mask_file=path)
+    with pytest.raises(ValueError, match="Only one of mask and mask_file"):
+        ImageSegmenter(
+            np.zeros([3, 32, 32]), mask=np.zeros([3, 32, 32]), mask_file=path
+        )
+
+
+def test_single_image_mask_file(tmp_path):
+    path = tmp_path / "mask.npy"
+    seg = ImageSegmenter(np.zeros([32, 32]), mask_file=path)
+    seg._onselect([(5, 5), (5, 20), (20, 20), (20, 5)])
+    assert seg.mask.shape == (32, 32)
+    assert np.load(path).shape == (1, 32, 32)
@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+import pytest
+from mpl_image_segmenter import ImageSegmenter
+from mpl_image_segmenter._tiled import TiledMask
+
+
+def test_tiled_mask():
+    rng = np.random.default_rng(0)
+    dense = np.zeros((3, 70, 90), dtype=np.uint8)
+    tiled = TiledMask(dense.shape, dense.dtype, tile_size=16)
+    for _ in range(50):
+        i = rng.integers(3)
+        r0, r1 = np.sort(rng.integers(0, 71, 2))
+        c0, c1 = np.sort(rng.integers(0, 91, 2))
+        values = rng.integers(0, 3, (r1 - r0, c1 - c0)) * rng.integers(0, 2)
+        dense[i, r0:r1, c0:c1] = values
+        tiled[i, r0:r1, c0:c1] = values
+        np.testing.assert_array_equal(tiled, dense)
+        np.testing.assert_array_equal(tiled[i, r0:, :c1], dense[i, r0:, :c1])
+    np.testing.assert_array_equal(tiled[1:], dense[1:])
+    assert tiled[2, 5, 6] == dense[2, 5, 6]
+    np.testing.assert_array_equal(TiledMask.from_dense(dense, 16), dense)
+
+    # erasing frees the tiles
+    tiled[:] = 0
+    assert tiled.nbytes == 0
+    tiled[0, 20:25, 20:25] = 1
+    assert tiled.nbytes == 16 * 16
+    with pytest.raises(IndexError):
+        tiled[0, ::2]
+
+
+def test_tiled_segmenter():
+    img = np.zeros([2, 1024, 1024])
+    square = [(25, 25), (25, 100), (100, 100), (100, 25)]
+    dense = ImageSegmenter(img, classes=2)
+    seg = ImageSegmenter(img, classes=2, mask_tile_size=256)
+    assert seg._mask.nbytes == 0
+    for s in (dense, seg):
+        s._onselect(square)
+        s.image_index = 1
+        s.current_class = 2
+        s._onselect(square)
+        s.undo()
+        s.image_index = 0
+    # only the one tile that was drawn on is allocated
+    assert seg._mask.nbytes == 256 * 256
+    np.testing.assert_array_equal(seg._overlay, dense._overlay)
+    np.testing.assert_array_equal(seg.class_counts, dense.class_counts)
+    np.testing.assert_array_equal(seg.mask, dense.mask)
+
+    # reading the mask makes it a single array that can be edited in place
+    seg.mask[1, :10] = 2
+    seg.image_index = 1
+    assert (seg._overlay[:10] == seg._color_lut()[2]).all()
+    seg.mask = dense.mask
+    assert isinstance(seg._mask, TiledMask)
+
+
+def test_tiles_while_writing():
+    # prefetching reads the tiles of other images while strokes add and free tiles
+    tiled = TiledMask((2, 512, 512), np.uint8, tile_size=8)
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        try:
+            while not stop.is_set():
+                list(tiled.tiles(1))
+                tiled[1]
+        except RuntimeError as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(200):
+            tiled[:, :, i % 512] = i % 2
+    finally:
+        stop.set()
+        reader.join()
+    assert errors == []